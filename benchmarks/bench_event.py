@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Benchmark notifying events on the event bus."""
+import asyncio
+import time
+
+import click
+
+from camacq.control import Center
+from camacq.event import Event
+
+HANDLER_COUNTS = (0, 10, 100)
+
+
+class BenchEvent(Event):
+    """Represent an event used in the benchmark."""
+
+    __slots__ = ()
+
+    event_type = "bench_event"
+
+
+async def handler(center, event):
+    """Handle the event without doing anything."""
+
+
+def setup_bus(handler_count):
+    """Return a center with handler_count handlers registered."""
+    center = Center(loop=asyncio.get_running_loop())
+    for _ in range(handler_count):
+        center.bus.register(BenchEvent.event_type, handler)
+    return center
+
+
+async def bench_notify(handler_count, rounds):
+    """Return the mean time in seconds to notify one event."""
+    center = setup_bus(handler_count)
+    event = BenchEvent()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await center.bus.notify(event)
+    return (time.perf_counter() - start) / rounds
+
+
+@click.command()
+@click.option("--rounds", default=10000, help="Number of notifies per measurement.")
+def main(rounds):
+    """Measure notify cost for different numbers of handlers."""
+    for handler_count in HANDLER_COUNTS:
+        mean = asyncio.run(bench_notify(handler_count, rounds))
+        click.echo(f"notify with {handler_count:>3} handlers: {mean * 1e6:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()  # pylint:disable=no-value-for-parameter
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Benchmark the memory used by the images of a sample."""
+import asyncio
+import gc
+import tracemalloc
+
+import click
+
+from camacq.control import Center
+from camacq.plugins.leica.sample import LeicaSample
+from camacq.plugins.sample import Image, register_sample
+
+FIELDS_PER_WELL = 12
+CHANNELS = 4
+WELLS_Y = 32
+
+
+def image_params(index):
+    """Return the set_sample parameters of the image with index."""
+    index, channel_id = divmod(index, CHANNELS)
+    index, field = divmod(index, FIELDS_PER_WELL)
+    well_x, well_y = divmod(index, WELLS_Y)
+    field_x, field_y = divmod(field, 4)
+    return {
+        "path": (
+            f"/images/U{well_x:02d}--V{well_y:02d}--X{field_x:02d}"
+            f"--Y{field_y:02d}--C{channel_id:02d}.ome.tif"
+        ),
+        "plate_name": "00",
+        "well_x": well_x,
+        "well_y": well_y,
+        "field_x": field_x,
+        "field_y": field_y,
+        "z_slice_id": 0,
+        "channel_id": channel_id,
+    }
+
+
+def measure_memory(func):
+    """Call func and return the memory in bytes that is still allocated."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        keep = func()
+        gc.collect()
+        end, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del keep
+    return end - start
+
+
+def make_images(image_count):
+    """Return a list of image_count images."""
+    return [Image(**image_params(index)) for index in range(image_count)]
+
+
+async def make_sample(image_count):
+    """Return a sample with image_count images set."""
+    center = Center(loop=asyncio.get_running_loop())
+    sample = LeicaSample()
+    register_sample(center, sample)
+    for index in range(image_count):
+        await sample.set_sample("image", **image_params(index))
+    return sample
+
+
+@click.command()
+@click.option("--images", default=1000000, help="Number of images.")
+def main(images):
+    """Run the benchmark."""
+    image_bytes = measure_memory(lambda: make_images(images))
+    sample_bytes = measure_memory(lambda: asyncio.run(make_sample(images)))
+    click.echo(f"Images: {images}")
+    click.echo(f"Image objects: {image_bytes / images:.0f} bytes per image")
+    click.echo(f"Sample state: {sample_bytes / images:.0f} bytes per image")
+    click.echo(f"Sample state total: {sample_bytes / 2**20:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()  # pylint:disable=no-value-for-parameter
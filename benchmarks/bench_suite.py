@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""Benchmark the acquisition hot paths and report the results as JSON.
+
+Run the suite and save the results to compare them with a later run::
+
+    python benchmarks/bench_suite.py --output results.json
+"""
+import asyncio
+import json
+import platform
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+import click
+import numpy as np
+from bench_event import HANDLER_COUNTS, BenchEvent, setup_bus
+
+import camacq
+from camacq.config import DEFAULT_CONFIG_TEMPLATE, load_config_file
+from camacq.const import CAMACQ_STOP_EVENT
+from camacq.control import Center
+from camacq.image import make_proj, save_image
+from camacq.plugins.automations import (
+    CONF_ACTION,
+    CONF_AUTOMATIONS,
+    CONF_CONDITION,
+    CONFIG_SCHEMA as AUTOMATIONS_SCHEMA,
+    ActionSequence,
+    TemplateAction,
+    _process_condition,
+)
+from camacq.plugins.leica import LEICA_COMMAND_EVENT, LeicaApi
+from camacq.plugins.leica.sample import (
+    SET_SAMPLE_SCHEMA,
+    LeicaSample,
+    next_well_xy,
+)
+from camacq.plugins.sample import get_matched_samples, register_sample
+
+# Map plate size to number of wells in x and y.
+PLATE_FORMATS = {96: (12, 8), 384: (24, 16), 1536: (48, 32)}
+FIELDS_PER_WELL = (2, 3)
+CHANNELS = (0, 1)
+STACK_SIZES = (16, 32, 64)
+IMAGE_SHAPE = (128, 128)
+IMAGE_DESCRIPTION = "<OME><Image ID='Image:0'/></OME>"
+# Number of sends and delays to check that handlers don't pile up.
+CHURN_COUNT = 100000
+
+
+def measure(func, rounds):
+    """Call func rounds times and return timing stats in seconds."""
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return _stats(times)
+
+
+async def measure_async(func, rounds):
+    """Await func rounds times and return timing stats in seconds."""
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await func()
+        times.append(time.perf_counter() - start)
+    return _stats(times)
+
+
+def _stats(times):
+    """Return a dict of stats of a list of times."""
+    times = sorted(times)
+    return {
+        "rounds": len(times),
+        "mean": sum(times) / len(times),
+        "min": times[0],
+        "median": times[len(times) // 2],
+        "max": times[-1],
+    }
+
+
+def result(name, params, stats):
+    """Return a result entry."""
+    return {"name": name, "params": params, **stats}
+
+
+async def bench_notify(rounds):
+    """Benchmark notify fan-out to a number of handlers."""
+    results = []
+    for handler_count in HANDLER_COUNTS:
+        center = setup_bus(handler_count)
+        event = BenchEvent()
+        stats = await measure_async(lambda: center.bus.notify(event), rounds)
+        results.append(result("notify", {"handlers": handler_count}, stats))
+    return results
+
+
+async def bench_handler_churn(count):
+    """Benchmark many sends and delays and count the handlers left behind."""
+    center = Center(loop=asyncio.get_running_loop())
+    # pylint: disable=protected-access
+    registry = center.bus._registry
+    reply = {"cmd": "deletelist"}
+
+    async def send(command):
+        """Reply to the command directly."""
+        await api.receive([reply])
+
+    api = LeicaApi(center, {}, SimpleNamespace(send=send))
+    command = list(reply.items())
+
+    async def send_commands():
+        """Send the commands one at a time."""
+        for _ in range(count):
+            await api.send(command)
+
+    stats = await measure_async(send_commands, 1)
+    left = len(registry.get(LEICA_COMMAND_EVENT, {})) + len(api._pending)
+    results = [{**result("leica_send", {"count": count}, stats), "left": left}]
+
+    sequence = ActionSequence(center, [])
+
+    async def delay_actions():
+        """Fire the delays and wait for them."""
+        for _ in range(count):
+            sequence.delay(0.0, {}, [])
+        await asyncio.sleep(0.01)
+        await center.wait_for()
+
+    stats = await measure_async(delay_actions, 1)
+    left = len(registry.get(CAMACQ_STOP_EVENT, {}))
+    results.append({**result("action_delay", {"count": count}, stats), "left": left})
+    return results
+
+
+async def make_plate(center, plate_size):
+    """Return a sample with all images of a plate set."""
+    sample = LeicaSample()
+    register_sample(center, sample)
+    x_wells, y_wells = PLATE_FORMATS[plate_size]
+    set_times = []
+    for well_x in range(x_wells):
+        for well_y in range(y_wells):
+            for field_x in range(FIELDS_PER_WELL[0]):
+                for field_y in range(FIELDS_PER_WELL[1]):
+                    for channel_id in CHANNELS:
+                        path = (
+                            f"U{well_x:02d}--V{well_y:02d}--X{field_x:02d}"
+                            f"--Y{field_y:02d}--C{channel_id:02d}.ome.tif"
+                        )
+                        start = time.perf_counter()
+                        await sample.set_sample(
+                            "image",
+                            path=path,
+                            plate_name="00",
+                            well_x=well_x,
+                            well_y=well_y,
+                            field_x=field_x,
+                            field_y=field_y,
+                            z_slice_id=0,
+                            channel_id=channel_id,
+                        )
+                        set_times.append(time.perf_counter() - start)
+    return sample, _stats(set_times)
+
+
+async def bench_sample(rounds):
+    """Benchmark sample state operations on different plate formats."""
+    results = []
+    for plate_size, (x_wells, y_wells) in PLATE_FORMATS.items():
+        params = {"plate": plate_size}
+        center = Center(loop=asyncio.get_running_loop())
+        sample, stats = await make_plate(center, plate_size)
+        results.append(result("set_sample_image", params, stats))
+        last = {"plate_name": "00", "well_x": x_wells - 1, "well_y": y_wells - 1}
+        containers = {
+            "plate": sample.get_sample("plate", plate_name="00"),
+            "well": sample.get_sample("well", **last),
+            "field": sample.get_sample("field", **last, field_x=0, field_y=0),
+        }
+        for name, container in containers.items():
+            stats = measure(lambda: container.images, rounds)
+            results.append(result(f"{name}_images", params, stats))
+
+        stats = measure(
+            lambda: get_matched_samples(
+                sample,
+                "field",
+                attrs={"well_x": last["well_x"], "well_y": last["well_y"]},
+                values={"field_img_ok": True},
+            ),
+            rounds,
+        )
+        results.append(result("get_matched_samples", params, stats))
+
+        # Mark the first half of the wells as done.
+        for well_x in range(x_wells // 2):
+            for well_y in range(y_wells):
+                await sample.set_sample(
+                    "well",
+                    plate_name="00",
+                    well_x=well_x,
+                    well_y=well_y,
+                    values={"well_img_ok": True},
+                )
+        stats = measure(
+            lambda: next_well_xy(sample, "00", x_wells=x_wells, y_wells=y_wells),
+            rounds,
+        )
+        results.append(result("next_well_xy", params, stats))
+    return results
+
+
+def bench_validate_sample(rounds):
+    """Benchmark set_sample validation per container type."""
+    well = {"plate_name": "00", "well_x": 1, "well_y": 2}
+    field = {**well, "field_x": 1, "field_y": 0}
+    containers = {
+        "plate": {"name": "plate", "plate_name": "00"},
+        "well": {"name": "well", **well, "values": {"well_img_ok": True}},
+        "field": {"name": "field", **field},
+        "z_slice": {"name": "z_slice", **well, "z_slice_id": 3},
+        "channel": {"name": "channel", **well, "channel_id": 1},
+        "image": {
+            "name": "image",
+            **field,
+            "path": "image--U01--V02--X01--Y00--Z03--C01.ome.tif",
+            "z_slice_id": 3,
+            "channel_id": 1,
+        },
+    }
+    results = []
+    for name, data in containers.items():
+        stats = measure(lambda: SET_SAMPLE_SCHEMA(data), rounds)
+        results.append(result("validate_set_sample", {"container": name}, stats))
+    return results
+
+
+def bench_render_template(rounds):
+    """Benchmark rendering the templates of the default automations."""
+    center = Center(loop=asyncio.get_running_loop())
+    sample = LeicaSample()
+    register_sample(center, sample)
+    config = load_config_file(Path(camacq.__file__).parent / DEFAULT_CONFIG_TEMPLATE)
+    automations = AUTOMATIONS_SCHEMA(config[CONF_AUTOMATIONS])
+    actions = [
+        TemplateAction(center, action_conf)
+        for block in automations
+        for action_conf in block[CONF_ACTION]
+    ]
+    conditions = [
+        _process_condition(center, block[CONF_CONDITION]) for block in automations
+    ]
+    event = SimpleNamespace(
+        plate_name="00",
+        well_x=1,
+        well_y=2,
+        field_x=1,
+        field_y=1,
+        job_id=4,
+        channel_id=0,
+        channel_name="red",
+        path="/tmp/image--U01--V02--E04--X01--Y01--C00.ome.tif",
+        images={},
+    )
+    variables = {"samples": center.samples, "trigger": {"event": event}}
+
+    def render_all():
+        """Render all templates of the default automations."""
+        for action in actions:
+            action.render(variables)
+        for condition in conditions:
+            condition(variables)
+
+    stats = measure(render_all, rounds)
+    params = {"actions": len(actions), "conditions": len(conditions)}
+    return [result("render_template_default_automations", params, stats)]
+
+
+def bench_make_proj(rounds):
+    """Benchmark max projections of image stacks."""
+    results = []
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for stack_size in STACK_SIZES:
+            images = {}
+            for z_slice in range(stack_size):
+                path = Path(tmp_dir) / f"stack{stack_size}--Z{z_slice:02d}.ome.tif"
+                data = rng.integers(0, 4096, IMAGE_SHAPE, dtype=np.uint16)
+                save_image(str(path), data, description=IMAGE_DESCRIPTION)
+                images[str(path)] = 0
+            stats = measure(lambda: make_proj(images), rounds)
+            results.append(result("make_proj", {"images": stack_size}, stats))
+    return results
+
+
+async def run_suite(rounds):
+    """Run all benchmarks and return the results."""
+    results = await bench_notify(rounds * 100)
+    results.extend(await bench_handler_churn(CHURN_COUNT))
+    results.extend(await bench_sample(rounds))
+    results.extend(bench_validate_sample(rounds * 10))
+    results.extend(bench_render_template(rounds))
+    results.extend(bench_make_proj(max(rounds // 10, 1)))
+    return results
+
+
+@click.command()
+@click.option("--rounds", default=100, help="Number of rounds per measurement.")
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write the JSON results to this file instead of stdout.",
+)
+def main(rounds, output):
+    """Run the benchmark suite."""
+    report = {
+        "camacq": camacq.__version__,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "results": asyncio.run(run_suite(rounds)),
+    }
+    text = json.dumps(report, indent=2)
+    if output:
+        Path(output).write_text(text + "\n", encoding="utf-8")
+    else:
+        click.echo(text)
+
+
+if __name__ == "__main__":
+    main()  # pylint:disable=no-value-for-parameter
@@ -1,11 +1,30 @@
 """Hold events."""
 
+import asyncio
 import logging
+from collections import namedtuple
+from contextvars import ContextVar
+from functools import wraps
+from itertools import count
 
 from camacq.const import BASE_EVENT
 
 _LOGGER = logging.getLogger(__name__)
 
+CONCURRENT_HANDLER_LIMIT = 10
+EXECUTION_CONCURRENT = "concurrent"
+EXECUTION_FIRE_AND_FORGET = "fire_and_forget"
+EXECUTION_SEQUENTIAL = "sequential"
+EXECUTION_MODES = (
+    EXECUTION_SEQUENTIAL,
+    EXECUTION_CONCURRENT,
+    EXECUTION_FIRE_AND_FORGET,
+)
+
+_Dispatch = namedtuple("_Dispatch", EXECUTION_MODES)
+# Track how deep in nested notify calls the current task is.
+_NOTIFY_DEPTH = ContextVar("notify_depth", default=0)
+
 
 # pylint: disable=too-few-public-methods
 class Event:
@@ -37,29 +56,134 @@ class EventBus:
     ----------
     center : Center instance
         The Center instance.
+    concurrent_limit : int, optional
+        The maximum number of concurrent handlers to run at the same
+        time for one notified event.
     """
 
-    def __init__(self, center):
+    # The registry, the dispatch cache with its invalidation table, the
+    # observers and the metrics are separate lookups on the notify path.
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, center, concurrent_limit=CONCURRENT_HANDLER_LIMIT):
         """Set up instance."""
         self._center = center
+        self._concurrent_limit = concurrent_limit
+        self._metrics = None
+        self._handles = count()
+        self._observers = []
+        # Map event type to handle to registered handler entry.
         self._registry = {}
+        # Map event class to flattened tuples of handlers per execution mode.
+        self._dispatch_cache = {}
+        # Map event type to the event classes cached with handlers for it.
+        self._cached_classes = {}
 
     @property
     def event_types(self):
         """:list: Return all registered event types."""
         return list(self._registry.keys())
 
-    def _register_handler(self, event_type, handler):
-        """Register handler to fire for events of type event_class."""
-        handlers = self._registry.setdefault(event_type, [])
-        handlers.append(handler)
+    @property
+    def metrics(self):
+        """:BusMetrics instance: Return the metrics of the bus or None.
+
+        :setter: Set a BusMetrics instance to collect metrics or None
+            to stop collecting.
+        """
+        return self._metrics
+
+    @metrics.setter
+    def metrics(self, value):
+        """Set the metrics of the bus."""
+        self._metrics = value
+        self._dispatch_cache.clear()
+        self._cached_classes.clear()
+
+    def add_observer(self, observer):
+        """Add an observer of all events and return a function to remove it.
+
+        Observers are called before any handler, for every event.
+
+        Parameters
+        ----------
+        observer : callable
+            A function that should accept two parameters, event and
+            depth. The first parameter is the Event instance that has
+            fired, the second parameter is the number of notify calls
+            that the event was fired within. Events that are not fired
+            by an event handler have depth zero.
+
+        Returns
+        -------
+        callable
+            Return a function to remove the observer.
+        """
+        self._observers.append(observer)
+
+        def remove():
+            """Remove the observer."""
+            try:
+                self._observers.remove(observer)
+            except ValueError:
+                _LOGGER.warning("Observer %s already removed from bus", observer)
+
+        return remove
+
+    def _register_handler(self, event_type, entry):
+        """Register handler entry to fire for events of type event_class.
 
-    def register(self, event_type, handler):
+        Return a handle that identifies the entry.
+        """
+        handle = next(self._handles)
+        self._registry.setdefault(event_type, {})[handle] = entry
+        self._invalidate(event_type)
+        return handle
+
+    def _invalidate(self, event_type):
+        """Drop cached dispatch entries for classes that use event_type."""
+        for event_class in self._cached_classes.pop(event_type, ()):
+            self._dispatch_cache.pop(event_class, None)
+
+    def _get_dispatch(self, event_class):
+        """Return the handlers to call for an event class.
+
+        Walk the method resolution order of the event class once and
+        cache the flattened result until a handler for one of the
+        event types of the class is registered or removed.
+        """
+        try:
+            return self._dispatch_cache[event_class]
+        except KeyError:
+            pass
+        registry = self._registry
+        handlers = {mode: [] for mode in EXECUTION_MODES}
+        for base_class in event_class.__mro__:
+            # Handle base objects for Python 3.
+            if base_class is object:
+                continue
+            event_type = base_class.event_type
+            for handler, mode in registry.get(event_type, {}).values():
+                if self._metrics is not None:
+                    handler = self._metrics.wrap(handler)
+                handlers[mode].append(handler)
+            self._cached_classes.setdefault(event_type, set()).add(event_class)
+        dispatch = _Dispatch(**{mode: tuple(val) for mode, val in handlers.items()})
+        self._dispatch_cache[event_class] = dispatch
+        return dispatch
+
+    def register(self, event_type, handler, mode=EXECUTION_SEQUENTIAL):
         """Register event handler and return a function to remove it.
 
         An event can be a message from the microscope API or an
         internal event.
 
+        Sequential handlers are awaited one after the other in the order
+        they were registered. Concurrent handlers are awaited together
+        with the sequential handlers, with at most ``concurrent_limit``
+        running at the same time. Fire and forget handlers are scheduled
+        as tasks and are not awaited by the notify call.
+
         Parameters
         ----------
         event_type : str
@@ -68,25 +192,72 @@ class EventBus:
             A coroutine function that should accept two parameters, center and
             event. The first parameter is the Center instance, the
             second parameter is the Event instance that has fired.
+        mode : str, optional
+            The execution mode of the handler. One of ``sequential``,
+            ``concurrent`` or ``fire_and_forget``. Default is ``sequential``.
 
         Returns
         -------
         callable
             Return a function to remove the registered handler.
         """
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Invalid execution mode: {mode}")
         _LOGGER.debug("Registering event handler for event type %s", event_type)
-        self._register_handler(event_type, handler)
+        handle = self._register_handler(event_type, (handler, mode))
 
         def remove():
             """Remove registered event handler."""
-            handlers = self._registry[event_type]
-            try:
-                handlers.remove(handler)
-            except ValueError:
+            if self._registry[event_type].pop(handle, None) is None:
                 _LOGGER.warning("Handler %s already removed from bus", handler)
+                return
+            self._invalidate(event_type)
 
         return remove
 
+    def register_once(self, event_type, handler, mode=EXECUTION_SEQUENTIAL):
+        """Register event handler that is removed after it has fired once.
+
+        Parameters
+        ----------
+        event_type : str
+            A string representing the type of event.
+        handler : callable
+            A coroutine function that should accept two parameters, center and
+            event. The first parameter is the Center instance, the
+            second parameter is the Event instance that has fired.
+        mode : str, optional
+            The execution mode of the handler. One of ``sequential``,
+            ``concurrent`` or ``fire_and_forget``. Default is ``sequential``.
+
+        Returns
+        -------
+        callable
+            Return a function to remove the handler before it has fired.
+            Calling it after the handler has fired does nothing.
+        """
+        removed = False
+
+        def remove():
+            """Remove the handler if it's still registered."""
+            nonlocal removed
+            if removed:
+                return
+            removed = True
+            remove_handler()
+
+        @wraps(handler)
+        async def handle_once(center, event):
+            """Remove the handler and call it."""
+            # A notify that started before removal may still call the handler.
+            if removed:
+                return
+            remove()
+            await handler(center, event)
+
+        remove_handler = self.register(event_type, handle_once, mode)
+        return remove
+
     async def notify(self, event):
         """Notify handlers that an event has fired.
 
@@ -96,14 +267,44 @@ class EventBus:
             An instance of Event or an instance of subclass of Event.
         """
         _LOGGER.debug("Notifying event %s", event)
+        depth = _NOTIFY_DEPTH.get()
+        for observer in self._observers:
+            observer(event, depth)
+        if self._metrics is not None:
+            self._metrics.count_event(event.event_type)
+        token = _NOTIFY_DEPTH.set(depth + 1)
+        try:
+            await self._dispatch(event)
+        finally:
+            _NOTIFY_DEPTH.reset(token)
+
+    async def _dispatch(self, event):
+        """Call the handlers for an event."""
         # Inspired by https://goo.gl/VEPG3n
-        registry = self._registry
-        for event_class in event.__class__.__mro__:
-            # Handle base objects for Python 3.
-            if event_class.__name__ == "object":
-                continue
-            for handler in registry.get(event_class.event_type, []):
-                await handler(self._center, event)  # await in sequential order
+        center = self._center
+        dispatch = self._get_dispatch(event.__class__)
+        for handler in dispatch.fire_and_forget:
+            center.create_task(handler(center, event))
+        if not dispatch.concurrent:
+            for handler in dispatch.sequential:
+                await handler(center, event)  # await in sequential order
+            return
+        semaphore = asyncio.Semaphore(self._concurrent_limit)
+
+        async def run_sequential():
+            """Run the sequential handlers in order."""
+            for handler in dispatch.sequential:
+                await handler(center, event)  # await in sequential order
+
+        async def run_concurrent(handler):
+            """Run a concurrent handler when there's room."""
+            async with semaphore:
+                await handler(center, event)
+
+        await asyncio.gather(
+            run_sequential(),
+            *(run_concurrent(handler) for handler in dispatch.concurrent),
+        )
 
 
 def match_event(event, **event_data):
@@ -99,6 +99,35 @@ def has_at_least_one_key(*keys):
     return validate
 
 
+def select_schema(key, schemas):
+    """Validate with the schema selected by the value of a key.
+
+    Parameters
+    ----------
+    key : str
+        The key of the value that selects the schema.
+    schemas : dict
+        A dict with key values as keys and schemas as values.
+    """
+    schemas = {value: vol.Schema(schema) for value, schema in schemas.items()}
+
+    def validate(obj):
+        """Validate obj with the schema selected by the key value."""
+        if not isinstance(obj, dict):
+            raise vol.Invalid("expected a dictionary")
+        if key not in obj:
+            raise vol.RequiredFieldInvalid("required key not provided", path=[key])
+        try:
+            schema = schemas.get(obj[key])
+        except TypeError:  # unhashable value
+            schema = None
+        if schema is None:
+            raise vol.Invalid("not a valid value for dictionary value", path=[key])
+        return schema(obj)
+
+    return validate
+
+
 def ensure_dict(value):
     """Convert None to empty dict."""
     if value is None:
@@ -6,6 +6,7 @@ from jinja2.sandbox import ImmutableSandboxedEnvironment
 from camacq.exceptions import TemplateError
 from camacq.plugins.leica.sample import next_well_xy
 from camacq.plugins.sample import get_matched_samples
+from camacq.plugins.sample.well_order import ORDER_ROW, well_order
 
 TEMPLATE_ENV_DATA = "template_env"
 
@@ -18,6 +19,7 @@ def get_env(center):
         env = _set_global(env, "next_well_x", template_next_well_x)
         env = _set_global(env, "next_well_y", template_next_well_y)
         env = _set_global(env, "matched_samples", get_matched_samples)
+        env = _set_global(env, "well_order", template_well_order)
         center.data[TEMPLATE_ENV_DATA] = env
     return center.data[TEMPLATE_ENV_DATA]
 
@@ -55,18 +57,27 @@ def render_template(data, variables):
     return rendered
 
 
-def template_next_well_xy(sample, plate_name, x_wells=12, y_wells=8):
+def template_next_well_xy(sample, plate_name, x_wells=12, y_wells=8, order=ORDER_ROW):
     """Return the next not done well for the given plate x, y format."""
-    return next_well_xy(sample, plate_name, x_wells, y_wells)
+    return next_well_xy(sample, plate_name, x_wells, y_wells, order)
 
 
-def template_next_well_x(sample, plate_name, x_wells=12, y_wells=8):
+def template_next_well_x(sample, plate_name, x_wells=12, y_wells=8, order=ORDER_ROW):
     """Return the next well x coordinate for the plate x, y format."""
-    x_well, _ = next_well_xy(sample, plate_name, x_wells=x_wells, y_wells=y_wells)
+    x_well, _ = next_well_xy(
+        sample, plate_name, x_wells=x_wells, y_wells=y_wells, order=order
+    )
     return x_well
 
 
-def template_next_well_y(sample, plate_name, x_wells=12, y_wells=8):
+def template_next_well_y(sample, plate_name, x_wells=12, y_wells=8, order=ORDER_ROW):
     """Return the next well x coordinate for the plate x, y format."""
-    _, y_well = next_well_xy(sample, plate_name, x_wells=x_wells, y_wells=y_wells)
+    _, y_well = next_well_xy(
+        sample, plate_name, x_wells=x_wells, y_wells=y_wells, order=order
+    )
     return y_well
+
+
+def template_well_order(x_wells=12, y_wells=8, order=ORDER_ROW):
+    """Return a list of the wells of the plate x, y format in order."""
+    return list(well_order(x_wells, y_wells, order))
@@ -0,0 +1,161 @@
+"""Collect metrics of the event bus."""
+
+from bisect import bisect_left
+from time import perf_counter
+
+# Upper bounds in seconds of the latency histogram buckets, from 1 us to
+# about 134 s. The last bucket holds everything above the last bound.
+BUCKET_BOUNDS = tuple(1e-6 * 2**exp for exp in range(28))
+SLOWEST_HANDLERS = 10
+
+
+class Histogram:
+    """Represent a latency histogram with fixed buckets.
+
+    Recording a value does not allocate any new objects.
+
+    Attributes
+    ----------
+    count : int
+        The number of recorded values.
+    total : float
+        The sum of the recorded values.
+    max : float
+        The largest recorded value.
+    """
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        """Set up instance."""
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value):
+        """Record a value in seconds."""
+        self.counts[bisect_left(BUCKET_BOUNDS, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, percent):
+        """Return the upper bucket bound that holds the percentile.
+
+        Parameters
+        ----------
+        percent : float
+            The percentile to return, between 0 and 100.
+
+        Returns
+        -------
+        float
+            Return the upper bound in seconds of the bucket.
+        """
+        if not self.count:
+            return 0.0
+        rank = self.count * percent / 100
+        cumulative = 0
+        for bound, bucket_count in zip(BUCKET_BOUNDS, self.counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class HandlerStats(Histogram):
+    """Represent the latency stats of an event handler.
+
+    Parameters
+    ----------
+    name : str
+        The name of the handler.
+    """
+
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        """Set up instance."""
+        super().__init__()
+        self.name = name
+
+    def as_dict(self):
+        """Return a dict with the stats of the handler."""
+        return {
+            "name": self.name,
+            "count": self.count,
+            "total": self.total,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class BusMetrics:
+    """Collect notify counts and handler latencies of the event bus.
+
+    Set an instance as the metrics of an EventBus instance to start
+    collecting metrics.
+    """
+
+    def __init__(self):
+        """Set up instance."""
+        self.event_counts = {}
+        self._handlers = {}
+
+    @property
+    def handlers(self):
+        """:list: Return the stats of all timed handlers."""
+        return list(self._handlers.values())
+
+    def count_event(self, event_type):
+        """Count a notify of an event type."""
+        self.event_counts[event_type] = self.event_counts.get(event_type, 0) + 1
+
+    def wrap(self, handler):
+        """Return a handler that records the latency of handler.
+
+        Stats are aggregated by handler name, so handlers that are
+        registered anew per call share one entry and are not kept alive.
+        """
+        name = _handler_name(handler)
+        stats = self._handlers.get(name)
+        if stats is None:
+            stats = self._handlers[name] = HandlerStats(name)
+        record = stats.record
+
+        async def timed_handler(center, event):
+            """Call the handler and record the latency."""
+            start = perf_counter()
+            try:
+                await handler(center, event)
+            finally:
+                record(perf_counter() - start)
+
+        return timed_handler
+
+    def slowest(self, number=SLOWEST_HANDLERS):
+        """Return the stats of the slowest handlers by p99 latency."""
+        return sorted(
+            self._handlers.values(),
+            key=lambda stats: (stats.percentile(99), stats.total),
+            reverse=True,
+        )[:number]
+
+    def summary(self, number=SLOWEST_HANDLERS):
+        """Return a dict with a summary of the metrics."""
+        return {
+            "event_counts": dict(self.event_counts),
+            "handlers": [stats.as_dict() for stats in self._handlers.values()],
+            "slowest": [stats.as_dict() for stats in self.slowest(number)],
+        }
+
+
+def _handler_name(handler):
+    """Return a readable name for a handler."""
+    name = getattr(handler, "__qualname__", None)
+    if name is None:
+        return repr(handler)
+    module = getattr(handler, "__module__", None)
+    return f"{module}.{name}" if module else name
@@ -36,6 +36,7 @@ ACTION_SEND = "send"
 ACTION_SEND_MANY = "send_many"
 ACTION_START_IMAGING = "start_imaging"
 ACTION_STOP_IMAGING = "stop_imaging"
+ACTION_SYNC_CAMLIST = "sync_camlist"
 CONF_API = "api"
 DATA_API = "api"
 
@@ -47,6 +48,34 @@ SEND_MANY_ACTION_SCHEMA = BASE_ACTION_SCHEMA.extend({"commands": validate_comman
 
 START_IMAGING_ACTION_SCHEMA = STOP_IMAGING_ACTION_SCHEMA = BASE_ACTION_SCHEMA
 
+CAMLIST_FIELD_SCHEMA = vol.Schema(
+    {
+        vol.Required("exp"): vol.Coerce(str),
+        vol.Required("well_x"): vol.Coerce(int),
+        vol.Required("well_y"): vol.Coerce(int),
+        vol.Required("field_x"): vol.Coerce(int),
+        vol.Required("field_y"): vol.Coerce(int),
+        vol.Optional("dxpos", default=0): vol.Coerce(int),
+        vol.Optional("dypos", default=0): vol.Coerce(int),
+    }
+)
+
+
+def validate_camlist_fields(value):
+    """Validate a list of cam list fields or a template string via JSON."""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError as exc:
+            raise vol.Invalid(f"Invalid fields: {value}") from exc
+    schema = vol.Schema([CAMLIST_FIELD_SCHEMA])
+    return schema(value)
+
+
+SYNC_CAMLIST_ACTION_SCHEMA = BASE_ACTION_SCHEMA.extend(
+    {"api_name": vol.Coerce(str), "fields": validate_camlist_fields}
+)
+
 ACTION_TO_METHOD = {
     ACTION_SEND: {"method": "send", "schema": SEND_ACTION_SCHEMA},
     ACTION_SEND_MANY: {"method": "send_many", "schema": SEND_MANY_ACTION_SCHEMA},
@@ -58,6 +87,10 @@ ACTION_TO_METHOD = {
         "method": "stop_imaging",
         "schema": STOP_IMAGING_ACTION_SCHEMA,
     },
+    ACTION_SYNC_CAMLIST: {
+        "method": "sync_camlist",
+        "schema": SYNC_CAMLIST_ACTION_SCHEMA,
+    },
 }
 
 
@@ -145,6 +178,17 @@ class Api:
         """Send a command to the microscope to stop the imaging."""
         raise NotImplementedError()
 
+    async def sync_camlist(self, fields, **kwargs):
+        """Change the cam list of the microscope to the given fields.
+
+        Parameters
+        ----------
+        fields : list
+            A list of dicts with the exp job, well and field
+            coordinates and the field offset of each cam list field.
+        """
+        raise NotImplementedError()
+
 
 # pylint: disable=too-few-public-methods
 class CommandEvent(Event):
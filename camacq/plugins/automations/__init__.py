@@ -292,16 +292,23 @@ class ActionSequence:
             A dict of template variables.
         """
         sequence = ActionSequence(self._center, waiting)
-        callback = partial(self._center.create_task, sequence(variables))
         waiting.clear()
         _LOGGER.info("Action delay for %s seconds", seconds)
-        callback = self._center.loop.call_later(seconds, callback)
+
+        def run_pending_actions():
+            """Run pending actions."""
+            remove_stop_handler()
+            self._center.create_task(sequence(variables))
+
+        callback = self._center.loop.call_later(seconds, run_pending_actions)
 
         async def cancel_pending_actions(center, event):
             """Cancel pending actions."""
             callback.cancel()
 
-        self._center.bus.register(CAMACQ_STOP_EVENT, cancel_pending_actions)
+        remove_stop_handler = self._center.bus.register_once(
+            CAMACQ_STOP_EVENT, cancel_pending_actions
+        )
 
 
 class TemplateAction:
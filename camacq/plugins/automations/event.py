@@ -4,6 +4,7 @@
 # https://github.com/home-assistant/home-assistant/blob/master/LICENSE.md
 # This file was modified by The Camacq Authors.
 import logging
+from itertools import count
 
 from camacq.const import CONF_ID, CONF_TRIGGER
 from camacq.event import match_event
@@ -15,20 +16,169 @@ _LOGGER = logging.getLogger(__name__)
 ATTR_EVENT = "event"
 CONF_EVENT_DATA = "data"
 CONF_EVENT = "event"
+DATA_EVENT_TRIGGERS = "event_triggers"
 
 
 def handle_trigger(center, config, trigger_func):
     """Listen for events."""
     event_type = config[CONF_ID]
     event_data = config.get(CONF_EVENT_DATA, {})
+    index = center.data.get(DATA_EVENT_TRIGGERS)
+    if index is None:
+        index = center.data[DATA_EVENT_TRIGGERS] = EventTriggerIndex(center)
 
-    async def handle_event(center, event):
-        """Listen for events and call trigger when data matches."""
-        if match_event(event, **event_data):
-            _LOGGER.debug("Trigger matched for event %s", event_type)
-            # pass variables from trigger with event
-            await trigger_func(
-                {CONF_TRIGGER: {CONF_TYPE: CONF_EVENT, ATTR_EVENT: event}}
+    async def handle_event(event):
+        """Call trigger when event data has matched."""
+        _LOGGER.debug("Trigger matched for event %s", event_type)
+        # pass variables from trigger with event
+        await trigger_func({CONF_TRIGGER: {CONF_TYPE: CONF_EVENT, ATTR_EVENT: event}})
+
+    return index.add(event_type, event_data, handle_event)
+
+
+# pylint: disable=too-few-public-methods
+class EventTriggerIndex:
+    """Index event triggers by event type and event data.
+
+    One bus handler is registered per event type. Triggers are grouped
+    by the attribute names they filter on and keyed on the attribute
+    values, so each event only has to look up the triggers that match.
+    """
+
+    def __init__(self, center):
+        """Set up instance."""
+        self._center = center
+        self._counter = count()
+        self._event_triggers = {}
+
+    def add(self, event_type, event_data, action):
+        """Add a trigger and return a function to remove it.
+
+        Parameters
+        ----------
+        event_type : str
+            The event type to listen to.
+        event_data : dict
+            The event attributes and values that should match.
+        action : callable
+            A coroutine function that should accept the matched event.
+
+        Returns
+        -------
+        callable
+            Return a function to remove the trigger.
+        """
+        triggers = self._event_triggers.get(event_type)
+        if triggers is None:
+            triggers = self._event_triggers[event_type] = EventTriggers()
+            triggers.remove_listener = self._center.bus.register(
+                event_type, triggers.handle_event
             )
+        trigger = Trigger(next(self._counter), event_data, action)
+        triggers.add(trigger)
+
+        def remove():
+            """Remove the trigger."""
+            triggers.remove(trigger)
+            if not triggers and self._event_triggers.get(event_type) is triggers:
+                triggers.remove_listener()
+                del self._event_triggers[event_type]
+
+        return remove
+
+
+class EventTriggers:
+    """Hold the triggers for one event type."""
+
+    def __init__(self):
+        """Set up instance."""
+        self.remove_listener = None
+        # Map sorted attribute names to values to triggers.
+        self._groups = {}
+        # Triggers with unhashable values that need to be matched one by one.
+        self._unindexed = {}
+
+    def __len__(self):
+        """Return the number of triggers."""
+        return len(self._unindexed) + sum(
+            len(triggers)
+            for values_map in self._groups.values()
+            for triggers in values_map.values()
+        )
+
+    def add(self, trigger):
+        """Add a trigger."""
+        if trigger.values is None:
+            self._unindexed[trigger.trigger_id] = trigger
+            return
+        values_map = self._groups.setdefault(trigger.keys, {})
+        values_map.setdefault(trigger.values, {})[trigger.trigger_id] = trigger
+
+    def remove(self, trigger):
+        """Remove a trigger."""
+        trigger.active = False
+        if trigger.values is None:
+            self._unindexed.pop(trigger.trigger_id, None)
+            return
+        values_map = self._groups.get(trigger.keys, {})
+        triggers = values_map.get(trigger.values, {})
+        triggers.pop(trigger.trigger_id, None)
+        if not triggers:
+            values_map.pop(trigger.values, None)
+        if not values_map:
+            self._groups.pop(trigger.keys, None)
+
+    def match(self, event):
+        """Return the triggers that match the event in the order added."""
+        attrs = {}
+
+        def get_attr(key):
+            """Return an event attribute and compute it only once."""
+            try:
+                return attrs[key]
+            except KeyError:
+                value = attrs[key] = getattr(event, key, None)
+                return value
+
+        matched = []
+        for keys, values_map in self._groups.items():
+            values = tuple(get_attr(key) for key in keys)
+            try:
+                triggers = values_map.get(values)
+            except TypeError:  # unhashable event attribute
+                continue
+            if triggers:
+                matched.extend(triggers.values())
+        matched.extend(
+            trigger
+            for trigger in self._unindexed.values()
+            if match_event(event, **trigger.event_data)
+        )
+        matched.sort(key=lambda trigger: trigger.trigger_id)
+        return matched
+
+    async def handle_event(self, center, event):
+        """Listen for events and call triggers when data matches."""
+        for trigger in self.match(event):
+            # A previous trigger may have removed this one.
+            if trigger.active:
+                await trigger.action(event)
+
+
+class Trigger:
+    """Represent an event trigger."""
+
+    # pylint: disable=too-few-public-methods
 
-    return center.bus.register(event_type, handle_event)
+    def __init__(self, trigger_id, event_data, action):
+        """Set up instance."""
+        self.trigger_id = trigger_id
+        self.event_data = event_data
+        self.action = action
+        self.active = True
+        self.keys = tuple(sorted(event_data))
+        self.values = tuple(event_data[key] for key in self.keys)
+        try:
+            hash(self.values)
+        except TypeError:
+            self.values = None
@@ -0,0 +1,107 @@
+"""Provide diagnostics of the event bus."""
+
+import json
+import logging
+
+import voluptuous as vol
+
+from camacq.const import CAMACQ_STOP_EVENT
+from camacq.helper import BASE_ACTION_SCHEMA, ensure_dict
+from camacq.metrics import SLOWEST_HANDLERS, BusMetrics
+
+_LOGGER = logging.getLogger(__name__)
+ACTION_DUMP_METRICS = "dump_metrics"
+CONF_SLOWEST = "slowest"
+CONF_SUMMARY_PATH = "summary_path"
+DATA_METRICS = "metrics"
+
+CONFIG_SCHEMA = vol.Schema(
+    vol.All(
+        ensure_dict,
+        {
+            vol.Optional(CONF_SLOWEST, default=SLOWEST_HANDLERS): vol.All(
+                vol.Coerce(int), vol.Range(min=1)
+            ),
+            vol.Optional(CONF_SUMMARY_PATH): vol.Coerce(str),
+        },
+    )
+)
+
+DUMP_METRICS_ACTION_SCHEMA = BASE_ACTION_SCHEMA.extend(
+    {vol.Optional("path"): vol.Coerce(str)}
+)
+
+
+async def setup_module(center, config):
+    """Set up diagnostics plugin.
+
+    Parameters
+    ----------
+    center : Center instance
+        The Center instance.
+    config : dict
+        The config dict.
+    """
+    conf = config["diagnostics"]
+    slowest = conf[CONF_SLOWEST]
+    metrics = center.data[DATA_METRICS] = BusMetrics()
+    center.bus.metrics = metrics
+
+    async def dump_metrics(path=None):
+        """Log a summary of the metrics and optionally write it to path."""
+        summary = metrics.summary(slowest)
+        _LOGGER.info("Event bus metrics:\n%s", format_summary(summary))
+        if path:
+            await center.add_executor_job(write_summary, path, summary)
+
+    async def handle_action(**kwargs):
+        """Handle the action call to dump the metrics.
+
+        Parameters
+        ----------
+        **kwargs
+            Arbitrary keyword arguments. These will be passed to the
+            action function when an action is called.
+        """
+        await dump_metrics(kwargs.get("path"))
+
+    async def handle_stop(center, event):
+        """Dump the metrics when camacq stops."""
+        await dump_metrics(conf.get(CONF_SUMMARY_PATH))
+
+    center.actions.register(
+        "diagnostics", ACTION_DUMP_METRICS, handle_action, DUMP_METRICS_ACTION_SCHEMA
+    )
+    center.bus.register(CAMACQ_STOP_EVENT, handle_stop)
+
+
+def format_summary(summary):
+    """Return a readable string of a metrics summary."""
+    lines = ["Notify counts per event type:"]
+    for event_type, event_count in sorted(summary["event_counts"].items()):
+        lines.append(f"  {event_type}: {event_count}")
+    lines.append("Slowest handlers:")
+    for stats in summary["slowest"]:
+        lines.append(
+            f"  {stats['name']}: count={stats['count']} total={stats['total']:.6f}s "
+            f"p50={stats['p50'] * 1e3:.3f}ms p99={stats['p99'] * 1e3:.3f}ms "
+            f"max={stats['max'] * 1e3:.3f}ms"
+        )
+    return "\n".join(lines)
+
+
+def write_summary(path, summary):
+    """Write a metrics summary as JSON to path.
+
+    Parameters
+    ----------
+    path : str
+        The path to the JSON file.
+    summary : dict
+        The metrics summary.
+    """
+    try:
+        with open(path, "w", encoding="utf-8") as summary_file:
+            json.dump(summary, summary_file, indent=2)
+    except OSError as exc:
+        _LOGGER.error("Failed to write metrics summary: %s", exc)
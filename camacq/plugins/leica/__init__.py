@@ -2,14 +2,15 @@
 
 import asyncio
 import logging
+import os
 import tempfile
+from collections import deque
 from functools import partial
 
 import voluptuous as vol
 from async_timeout import timeout as async_timeout
 from leicacam.async_cam import AsyncCAM
-from leicacam.cam import bytes_as_dict, check_messages, tuples_as_bytes
-from leicaimage import attribute, attribute_as_str
+from leicacam.cam import bytes_as_dict, tuples_as_bytes
 
 from camacq.const import CAMACQ_STOP_EVENT
 from camacq.helper import ensure_dict
@@ -22,16 +23,34 @@ from camacq.plugins.api import (
     register_api,
 )
 
+from .camlist import CamList, CamListField
 from .command import start, stop
-from .helper import find_image_path, get_field, get_imgs
+from .dedupe import DedupeWindow
+from .helper import find_image_path, get_field, parse_image_path
+from .image_index import ImageIndex, ImageReplies
+from .ingest import IngestQueue
 from .sample import setup_module as sample_setup_module
 
 _LOGGER = logging.getLogger(__name__)
 
+CONF_DEDUPE_SIZE = "dedupe_size"
+CONF_DEDUPE_WINDOW = "dedupe_window"
 CONF_HOST = "host"
 CONF_IMAGING_DIR = "imaging_dir"
+CONF_LATE_THRESHOLD = "late_threshold"
 CONF_LEICA = "leica"
+CONF_ORDER_BY_WELL = "order_by_well"
 CONF_PORT = "port"
+CONF_QUEUE_SIZE = "queue_size"
+CONF_SEND_WINDOW = "send_window"
+CONF_WORKERS = "workers"
+DEFAULT_DEDUPE_SIZE = 10000
+DEFAULT_DEDUPE_WINDOW = 60.0
+DEFAULT_LATE_THRESHOLD = 10.0
+DEFAULT_ORDER_BY_WELL = True
+DEFAULT_QUEUE_SIZE = 100
+DEFAULT_SEND_WINDOW = 1
+DEFAULT_WORKERS = 1
 JOB_ID = "--E{:02d}"
 LEICA_COMMAND_EVENT = "leica_command_event"
 LEICA_START_COMMAND_EVENT = "leica_start_command_event"
@@ -50,6 +69,27 @@ CONFIG_SCHEMA = vol.Schema(
             vol.Optional(CONF_PORT, default=8895): vol.Coerce(int),
             # pylint: disable=no-value-for-parameter
             vol.Optional(CONF_IMAGING_DIR, default=tempfile.gettempdir()): vol.IsDir(),
+            vol.Optional(CONF_QUEUE_SIZE, default=DEFAULT_QUEUE_SIZE): vol.All(
+                vol.Coerce(int), vol.Range(min=1)
+            ),
+            vol.Optional(CONF_WORKERS, default=DEFAULT_WORKERS): vol.All(
+                vol.Coerce(int), vol.Range(min=1)
+            ),
+            vol.Optional(
+                CONF_ORDER_BY_WELL, default=DEFAULT_ORDER_BY_WELL
+            ): vol.Boolean(),
+            vol.Optional(
+                CONF_LATE_THRESHOLD, default=DEFAULT_LATE_THRESHOLD
+            ): vol.Coerce(float),
+            vol.Optional(CONF_DEDUPE_SIZE, default=DEFAULT_DEDUPE_SIZE): vol.All(
+                vol.Coerce(int), vol.Range(min=1)
+            ),
+            vol.Optional(CONF_DEDUPE_WINDOW, default=DEFAULT_DEDUPE_WINDOW): vol.All(
+                vol.Coerce(float), vol.Range(min=0)
+            ),
+            vol.Optional(CONF_SEND_WINDOW, default=DEFAULT_SEND_WINDOW): vol.All(
+                vol.Coerce(int), vol.Range(min=1)
+            ),
         },
     )
 )
@@ -84,6 +124,7 @@ async def setup_module(center, config):
         """Stop the task that listens to the client socket."""
         task.cancel()
         await task
+        await api.ingest_queue.stop()
         api.client.close()
 
     center.bus.register(CAMACQ_STOP_EVENT, stop_listen)
@@ -97,22 +138,84 @@ class LeicaApi(Api):
         self.center = center
         self.client = client
         self.config = config
-        self._last_image_path = None
+        self.image_replies = ImageReplies(
+            DedupeWindow(
+                config.get(CONF_DEDUPE_SIZE, DEFAULT_DEDUPE_SIZE),
+                config.get(CONF_DEDUPE_WINDOW, DEFAULT_DEDUPE_WINDOW),
+            ),
+            ImageIndex(),
+        )
+        self.camlist = CamList()
+        # Map command and value to the futures of the sent commands that
+        # wait for a reply, oldest first.
+        self._pending = {}
+        key_func = None
+        if config.get(CONF_ORDER_BY_WELL, DEFAULT_ORDER_BY_WELL):
+            key_func = _well_key
+        self.ingest_queue = IngestQueue(
+            center,
+            self.receive,
+            config.get(CONF_QUEUE_SIZE, DEFAULT_QUEUE_SIZE),
+            config.get(CONF_WORKERS, DEFAULT_WORKERS),
+            key_func=key_func,
+            late_threshold=config.get(CONF_LATE_THRESHOLD, DEFAULT_LATE_THRESHOLD),
+        )
 
     @property
     def name(self):
         """Return the name of the API."""
         return __name__
 
+    @property
+    def camlist_stats(self):
+        """:dict: Return the counters of the cam list syncs."""
+        return self.camlist.stats
+
+    @property
+    def dedupe_stats(self):
+        """:dict: Return the counters of the duplicate image reply check."""
+        return self.image_replies.stats
+
+    @property
+    def ingest_stats(self):
+        """:dict: Return the counters of the image reply queue."""
+        return self.ingest_queue.stats
+
     async def start_listen(self):
-        """Receive from the microscope socket."""
+        """Receive from the microscope socket.
+
+        Image replies are queued and handled by the ingest workers. Reading
+        from the socket waits while the queue is full. Command replies are
+        handled directly so that they are never blocked behind image
+        replies. Scan start and scan finished replies are handled after
+        all image replies that were queued before them.
+        """
         try:
             while True:
-                reply = await self.client.receive()
-                self.center.create_task(self.receive(reply))
+                replies = await self.client.receive()
+                if not isinstance(replies, list):
+                    replies = [replies]
+                command_replies = []
+                for reply in replies:
+                    if isinstance(reply, dict) and REL_IMAGE_PATH in reply:
+                        await self.ingest_queue.put(reply)
+                    elif _is_scan_reply(reply):
+                        if command_replies:
+                            self.center.create_task(self.receive(command_replies))
+                            command_replies = []
+                        self.center.create_task(self._receive_after_images(reply))
+                    else:
+                        command_replies.append(reply)
+                if command_replies:
+                    self.center.create_task(self.receive(command_replies))
         except asyncio.CancelledError:
             _LOGGER.debug("Stopped listening for messages from CAM")
 
+    async def _receive_after_images(self, reply):
+        """Receive a reply when the queued image replies have been handled."""
+        await self.ingest_queue.join()
+        await self.receive([reply])
+
     async def receive(self, replies):
         """Receive replies from CAM server and fire an event per reply.
 
@@ -133,30 +236,72 @@ class LeicaApi(Api):
             if REL_IMAGE_PATH in reply:
                 imaging_dir = self.config[CONF_IMAGING_DIR]
                 rel_path = reply[REL_IMAGE_PATH]
-                if rel_path == self._last_image_path:
+                if self.image_replies.seen(rel_path):
                     # guard against duplicate image events from the microscope
                     _LOGGER.debug("Duplicate image reply received: %s", rel_path)
                     continue
-                self._last_image_path = rel_path
                 image_path = find_image_path(rel_path, imaging_dir)
                 field_path = await self.center.add_executor_job(get_field, image_path)
                 image_paths = await self.center.add_executor_job(
                     partial(
-                        get_imgs,
+                        self.image_replies.new_images,
                         field_path,
-                        search=JOB_ID.format(attribute(image_path, "E")),
+                        search=JOB_ID.format(parse_image_path(image_path).job_id),
                     )
                 )
                 for path in image_paths:
                     # await in sequential order
-                    await self.center.bus.notify(LeicaImageEvent({"path": path}))
+                    await self.center.bus.notify(
+                        LeicaImageEvent({"path": os.fspath(path)})
+                    )
             elif SCAN_STARTED in list(reply.values()):
+                self._resolve_pending(reply)
+                # Images of a new scan may reuse the paths of the last scan.
+                self.image_replies.clear()
                 await self.center.bus.notify(LeicaStartCommandEvent(reply))
             elif SCAN_FINISHED in list(reply.values()):
+                self._resolve_pending(reply)
                 await self.center.bus.notify(LeicaStopCommandEvent(reply))
             else:
+                self._resolve_pending(reply)
                 await self.center.bus.notify(LeicaCommandEvent(reply))
 
+    def _resolve_pending(self, reply):
+        """Resolve the oldest pending command per matching key of a reply.
+
+        A command that was sent with a value waits for a reply with the
+        same command and value. A command without a value waits for a
+        reply with any value for the command.
+        """
+        if not self._pending:
+            return
+        for cmd, value in reply.items():
+            if not value:
+                continue
+            for key in ((cmd, value), (cmd, None)):
+                waiters = self._pending.get(key)
+                if waiters is None:
+                    continue
+                while waiters:
+                    # Skip commands that were cancelled but not yet removed.
+                    cmd_sent = waiters.popleft()
+                    if not cmd_sent.done():
+                        cmd_sent.set_result(True)
+                        break
+                if not waiters:
+                    del self._pending[key]
+
+    def _remove_pending(self, key, cmd_sent):
+        """Remove a cancelled command from the pending commands."""
+        if not cmd_sent.cancelled():
+            return
+        waiters = self._pending.get(key)
+        if waiters is None or cmd_sent not in waiters:
+            return
+        waiters.remove(cmd_sent)
+        if not waiters:
+            del self._pending[key]
+
     async def send(self, command, **kwargs):
         """Send a command to the Leica API.
 
@@ -170,17 +315,14 @@ class LeicaApi(Api):
         if isinstance(command, str):
             command = bytes_as_dict(command.encode())
             command = list(command.items())
+        self.camlist.track(command)
         cmd, value = command[0]  # use the first cmd and value to wait for
+        key = (cmd, value or None)
         cmd_sent = self.center.loop.create_future()
-
-        async def receive_reply(center, event):
-            """Indicate that reply has been received."""
-            if check_messages([event.data], cmd, value=value):
-                if not cmd_sent.done():
-                    cmd_sent.set_result(True)
-
-        remove = self.center.bus.register(LEICA_COMMAND_EVENT, receive_reply)
-        cmd_sent.add_done_callback(lambda x: remove())
+        # Register before sending since the reply may arrive before
+        # the send call returns.
+        self._pending.setdefault(key, deque()).append(cmd_sent)
+        cmd_sent.add_done_callback(partial(self._remove_pending, key))
 
         await self.client.send(command)
 
@@ -188,6 +330,55 @@ class LeicaApi(Api):
             return cmd_sent
         return await cmd_sent
 
+    async def send_many(self, commands, **kwargs):
+        """Send multiple commands to the Leica API.
+
+        At most send_window commands are waiting for a reply at a time.
+        The commands are sent in order. With a send_window of one, each
+        command waits for its reply before the next command is sent.
+
+        Parameters
+        ----------
+        commands : list
+            A list of commands to send.
+        """
+        window = self.config.get(CONF_SEND_WINDOW, DEFAULT_SEND_WINDOW)
+        if window == 1:
+            await super().send_many(commands, **kwargs)
+            return
+        in_flight = deque()
+        try:
+            for cmd in commands:
+                if len(in_flight) == window:
+                    await in_flight.popleft()
+                in_flight.append(await self.send(cmd, block=False))
+            while in_flight:
+                await in_flight.popleft()
+        finally:
+            for cmd_sent in in_flight:
+                cmd_sent.cancel()
+
+    async def sync_camlist(self, fields, **kwargs):
+        """Change the cam list of the microscope to the given fields.
+
+        Only the commands that are needed to change the current cam list
+        are sent.
+
+        Parameters
+        ----------
+        fields : list
+            A list of dicts with the exp job, well and field
+            coordinates and the field offset of each cam list field.
+        """
+        plan = self.camlist.plan([CamListField(**field) for field in fields])
+        await self.send_many(plan.commands)
+        self.camlist.apply(plan)
+        _LOGGER.debug(
+            "Synced cam list with %s commands, saved %s commands",
+            len(plan.commands),
+            plan.saved,
+        )
+
     async def start_imaging(self):
         """Send a command to the microscope to start the imaging."""
         await self._start_stop_imaging(start(), LEICA_START_COMMAND_EVENT, SCAN_STARTED)
@@ -210,7 +401,7 @@ class LeicaApi(Api):
             if not cmd_sent.done():
                 cmd_sent.set_result(True)
 
-        remove = self.center.bus.register(event, receive_reply)
+        remove = self.center.bus.register_once(event, receive_reply)
         cmd_sent.add_done_callback(lambda x: remove())
 
         trigger_cmd_sent = await self.send(cmd, block=False)
@@ -222,6 +413,20 @@ class LeicaApi(Api):
             _LOGGER.info("No acknowledgement event received, continuing anyway")
 
 
+def _is_scan_reply(reply):
+    """Return True if reply is a scan start or scan finished reply."""
+    if not isinstance(reply, dict):
+        return False
+    values = list(reply.values())
+    return SCAN_STARTED in values or SCAN_FINISHED in values
+
+
+def _well_key(reply):
+    """Return a key for the plate and well of an image reply."""
+    attrs = parse_image_path(reply[REL_IMAGE_PATH])
+    return (attrs.plate_name, attrs.well_x, attrs.well_y)
+
+
 # pylint: disable=too-few-public-methods
 class LeicaCommandEvent(CommandEvent):
     """Leica CommandEvent class."""
@@ -253,12 +458,21 @@ class LeicaStopCommandEvent(StopCommandEvent, LeicaCommandEvent):
 
 
 class LeicaImageEvent(ImageEvent):
-    """Leica ImageEvent class."""
+    """Leica ImageEvent class.
 
-    __slots__ = ()
+    The image attributes are parsed from the path once, when the event
+    is created.
+    """
+
+    __slots__ = ("_attrs",)
 
     event_type = LEICA_IMAGE_EVENT
 
+    def __init__(self, data=None):
+        """Set up event."""
+        super().__init__(data)
+        self._attrs = parse_image_path(os.fspath(self.path))
+
     @property
     def path(self):
         """:str: Return absolute path to the image."""
@@ -267,39 +481,39 @@ class LeicaImageEvent(ImageEvent):
     @property
     def well_x(self):
         """:int: Return x coordinate of the well of the image."""
-        return attribute(self.path, "U")
+        return self._attrs.well_x
 
     @property
     def well_y(self):
         """:int: Return y coordinate of the well of the image."""
-        return attribute(self.path, "V")
+        return self._attrs.well_y
 
     @property
     def field_x(self):
         """:int: Return x coordinate of the well of the image."""
-        return attribute(self.path, "X")
+        return self._attrs.field_x
 
     @property
     def field_y(self):
         """:int: Return y coordinate of the well of the image."""
-        return attribute(self.path, "Y")
+        return self._attrs.field_y
 
     @property
     def z_slice_id(self):
         """:int: Return z index of the image."""
-        return attribute(self.path, "Z")
+        return self._attrs.z_slice_id
 
     @property
     def channel_id(self):
         """:int: Return channel id of the image."""
-        return attribute(self.path, "C")
+        return self._attrs.channel_id
 
     @property
     def job_id(self):
         """:int: Return job id of the image."""
-        return attribute(self.path, "E")
+        return self._attrs.job_id
 
     @property
     def plate_name(self):
         """:str: Return plate name of the image."""
-        return attribute_as_str(self.path, "S")
+        return self._attrs.plate_name
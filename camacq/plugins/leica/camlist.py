@@ -0,0 +1,162 @@
+"""Keep track of the cam list of the microscope."""
+
+from collections import namedtuple
+
+from .command import cam_com, del_com, enable_com
+
+CamListField = namedtuple(
+    "CamListField",
+    ["exp", "well_x", "well_y", "field_x", "field_y", "dxpos", "dypos"],
+)
+CamListPlan = namedtuple("CamListPlan", ["commands", "fields", "disabled", "saved"])
+MATRIX_FIELD_KEYS = ("wellx", "welly", "fieldx", "fieldy")
+
+
+class CamList:
+    """Compute the commands to change the cam list to a set of fields.
+
+    The cam list is known after it has been deleted or synced. Missing
+    fields are added to the end of the list. Matrix fields with entries
+    that are not wanted are disabled and matrix fields with wanted
+    entries are enabled. The list is deleted and all fields are added
+    instead, if the list is unknown, if a matrix field has both wanted
+    and unwanted entries or if that needs fewer commands.
+
+    Attributes
+    ----------
+    syncs : int
+        The number of applied syncs.
+    sent : int
+        The number of commands sent by the applied syncs.
+    saved : int
+        The number of commands saved compared to deleting the list and
+        adding all fields for each sync.
+    """
+
+    def __init__(self):
+        """Set up instance."""
+        # The fields of the cam list in list order or None if unknown.
+        self._fields = None
+        # The matrix fields that have been disabled.
+        self._disabled = set()
+        self.syncs = 0
+        self.sent = 0
+        self.saved = 0
+
+    @property
+    def stats(self):
+        """:dict: Return the counters of the cam list syncs."""
+        return {"syncs": self.syncs, "sent": self.sent, "saved": self.saved}
+
+    def plan(self, fields):
+        """Return a plan to change the cam list to fields.
+
+        Parameters
+        ----------
+        fields : list
+            A list of CamListField instances in the wanted list order.
+
+        Returns
+        -------
+        CamListPlan instance
+            Return the commands and the cam list state after the
+            commands have been sent.
+        """
+        fields = list(dict.fromkeys(fields))
+        wanted = set(fields)
+        wanted_matrix = {_matrix_field(field) for field in fields}
+        enable = [
+            matrix_field
+            for matrix_field in dict.fromkeys(map(_matrix_field, fields))
+            if matrix_field in self._disabled
+        ]
+        rebuild = [del_com()]
+        rebuild.extend(_add_com(field) for field in fields)
+        rebuild.extend(enable_com(*matrix_field, True) for matrix_field in enable)
+        # Compare with deleting the list and adding each field.
+        baseline = 1 + len(fields)
+        rebuild_plan = CamListPlan(
+            rebuild,
+            tuple(fields),
+            frozenset(self._disabled.difference(enable)),
+            baseline - len(rebuild),
+        )
+        if self._fields is None:
+            return rebuild_plan
+
+        unwanted = [field for field in self._fields if field not in wanted]
+        disable = list(dict.fromkeys(map(_matrix_field, unwanted)))
+        if not wanted_matrix.isdisjoint(disable):
+            # A matrix field with both wanted and unwanted entries can't
+            # be disabled.
+            return rebuild_plan
+        current = set(self._fields)
+        added = [field for field in fields if field not in current]
+        commands = [
+            enable_com(*matrix_field, False)
+            for matrix_field in disable
+            if matrix_field not in self._disabled
+        ]
+        commands.extend(enable_com(*matrix_field, True) for matrix_field in enable)
+        commands.extend(_add_com(field) for field in added)
+        if len(commands) > len(rebuild):
+            return rebuild_plan
+        disabled = self._disabled.difference(enable).union(disable)
+        return CamListPlan(
+            commands,
+            (*self._fields, *added),
+            frozenset(disabled),
+            baseline - len(commands),
+        )
+
+    def apply(self, plan):
+        """Update the cam list state after the commands of a plan were sent.
+
+        Parameters
+        ----------
+        plan : CamListPlan instance
+            The plan that was sent.
+        """
+        self._fields = plan.fields
+        self._disabled = set(plan.disabled)
+        self.syncs += 1
+        self.sent += len(plan.commands)
+        self.saved += plan.saved
+
+    def track(self, command):
+        """Update the cam list state for a command sent outside of a sync.
+
+        Parameters
+        ----------
+        command : list of tuples
+            The sent command.
+        """
+        parts = dict(command)
+        cmd = parts.get("cmd")
+        if cmd == "deletelist":
+            self._fields = ()
+        elif cmd == "add":
+            self.clear()
+        elif cmd == "enable":
+            try:
+                matrix_field = tuple(int(parts[key]) - 1 for key in MATRIX_FIELD_KEYS)
+            except (KeyError, ValueError):
+                return
+            if str(parts.get("value")).lower() == "false":
+                self._disabled.add(matrix_field)
+            else:
+                self._disabled.discard(matrix_field)
+
+    def clear(self):
+        """Forget the cam list so that the next sync deletes it."""
+        self._fields = None
+
+
+def _add_com(field):
+    """Return the command to add a field to the cam list."""
+    return cam_com(*field)
+
+
+def _matrix_field(field):
+    """Return the well and field coordinates of a cam list field."""
+    return (field.well_x, field.well_y, field.field_x, field.field_y)
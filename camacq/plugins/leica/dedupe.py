@@ -0,0 +1,100 @@
+"""Suppress duplicate replies from the microscope."""
+
+import time
+from collections import OrderedDict
+
+
+class DedupeWindow:
+    """Remember recently seen keys within a time window and a size limit.
+
+    A key is a duplicate if it was seen less than max_age seconds ago. A
+    key that is seen again is remembered from that time. When more than
+    maxsize keys are remembered, the oldest key is evicted.
+
+    Parameters
+    ----------
+    maxsize : int
+        The maximum number of keys to remember.
+    max_age : float
+        The number of seconds to remember a key.
+    clock : callable, optional
+        A function that returns the current time in seconds.
+
+    Attributes
+    ----------
+    hits : int
+        The number of keys that were duplicates.
+    misses : int
+        The number of keys that were not duplicates.
+    evicted : int
+        The number of keys that were forgotten to stay within maxsize.
+    expired : int
+        The number of keys that were forgotten because of their age.
+    """
+
+    # The four counters are public attributes next to the limits and the
+    # remembered keys.
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, maxsize, max_age, clock=time.monotonic):
+        """Set up instance."""
+        self._maxsize = maxsize
+        self._max_age = max_age
+        self._clock = clock
+        # Map key to the time it was last seen, oldest first.
+        self._seen = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.expired = 0
+
+    def __len__(self):
+        """Return the number of remembered keys."""
+        return len(self._seen)
+
+    @property
+    def stats(self):
+        """:dict: Return the counters of the window."""
+        return {
+            "size": len(self._seen),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evicted": self.evicted,
+            "expired": self.expired,
+        }
+
+    def seen(self, key):
+        """Return True if key is a duplicate and remember key.
+
+        Parameters
+        ----------
+        key : hashable
+            The key to check, eg the relpath of an image reply.
+        """
+        now = self._clock()
+        self._expire(now)
+        duplicate = key in self._seen
+        if duplicate:
+            self.hits += 1
+            self._seen.move_to_end(key)
+        else:
+            self.misses += 1
+        self._seen[key] = now
+        if len(self._seen) > self._maxsize:
+            self._seen.popitem(last=False)
+            self.evicted += 1
+        return duplicate
+
+    def clear(self):
+        """Forget all keys."""
+        self._seen.clear()
+
+    def _expire(self, now):
+        """Forget the keys that are older than max_age."""
+        oldest = now - self._max_age
+        while self._seen:
+            key, seen_at = next(iter(self._seen.items()))
+            if seen_at > oldest:
+                break
+            del self._seen[key]
+            self.expired += 1
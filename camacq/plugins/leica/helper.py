@@ -1,9 +1,29 @@
 """Helper functions for Leica api."""
 
+import re
+from collections import namedtuple
+from functools import lru_cache
 from pathlib import Path, PureWindowsPath
 
 from leicaimage import experiment
 
+IMAGE_ATTRIBUTE_RE = re.compile(r"--([A-Z])([0-9]{2})")
+PARSE_CACHE_SIZE = 16384
+
+ImageAttributes = namedtuple(
+    "ImageAttributes",
+    (
+        "plate_name",
+        "well_x",
+        "well_y",
+        "field_x",
+        "field_y",
+        "z_slice_id",
+        "channel_id",
+        "job_id",
+    ),
+)
+
 
 def find_image_path(relpath, root):
     """Parse the relpath from the server to find file path from root.
@@ -85,3 +105,40 @@ def get_imgs(path, img_type="tif", search=""):
         if pattern not in path:
             _path = _path / f"{pattern}*"
     return list(root.glob(f"{_path}{search}.{img_type}"))
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_image_path(path):
+    """Parse the attributes of an image from the image path.
+
+    The last match of an attribute in the path is used. The results are
+    cached per path.
+
+    Parameters
+    ----------
+    path : str
+        Path to image.
+
+    Returns
+    -------
+    ImageAttributes instance
+        Return a named tuple with the image attributes. Attributes that
+        are not found are None.
+    """
+    attrs = dict(IMAGE_ATTRIBUTE_RE.findall(path))
+
+    def as_int(name):
+        """Return an attribute as int or None if not found."""
+        value = attrs.get(name)
+        return int(value) if value is not None else None
+
+    return ImageAttributes(
+        plate_name=attrs.get("S"),
+        well_x=as_int("U"),
+        well_y=as_int("V"),
+        field_x=as_int("X"),
+        field_y=as_int("Y"),
+        z_slice_id=as_int("Z"),
+        channel_id=as_int("C"),
+        job_id=as_int("E"),
+    )
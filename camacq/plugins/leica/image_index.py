@@ -0,0 +1,112 @@
+"""Keep track of the images in the field directories of the imaging dir."""
+
+import os
+import threading
+from pathlib import Path
+
+
+class ImageIndex:
+    """Index the images of field directories and return new images once.
+
+    The file names of a field directory are listed when images of the
+    field are requested. Listing the directory and comparing the names
+    with the names listed before still takes time in proportion to the
+    number of files in the directory. Only the names that were not
+    listed before are matched against the image name pattern and
+    sorted. An image is returned only once, until the index is cleared.
+    The methods are thread safe.
+
+    Parameters
+    ----------
+    img_type : str
+        The image file type extension.
+    """
+
+    def __init__(self, img_type="tif"):
+        """Set up instance."""
+        self._suffix = f".{img_type}"
+        self._lock = threading.Lock()
+        # Map field path to the file names that have been listed.
+        self._listed = {}
+        # Map field path to the image names that have not been returned.
+        self._new = {}
+
+    def new_images(self, field_path, search=""):
+        """Return the new images of a field directory.
+
+        Parameters
+        ----------
+        field_path : str
+            Path to the field directory.
+        search : str
+            A string that the image file names should contain.
+
+        Returns
+        -------
+        list
+            Return paths of the new images in name order.
+        """
+        try:
+            names = os.listdir(field_path)
+        except FileNotFoundError:
+            return []
+        with self._lock:
+            listed = self._listed.setdefault(field_path, set())
+            new = self._new.setdefault(field_path, set())
+            added = set(names).difference(listed)
+            listed.update(added)
+            new.update(
+                name
+                for name in added
+                if name.startswith("image--") and name.endswith(self._suffix)
+            )
+            found = sorted(name for name in new if search in name)
+            new.difference_update(found)
+        root = Path(field_path)
+        return [root / name for name in found]
+
+    def clear(self):
+        """Forget all listed images."""
+        with self._lock:
+            self._listed.clear()
+            self._new.clear()
+
+
+class ImageReplies:
+    """Find the new images of image replies from the microscope.
+
+    A reply is skipped if its image path is a duplicate within the
+    dedupe window. Both the window and the index are cleared when a new
+    scan starts, since the images of the scan may reuse the paths of the
+    last scan.
+
+    Parameters
+    ----------
+    dedupe : DedupeWindow instance
+        The window of recently seen image paths.
+    index : ImageIndex instance
+        The index of the images in the field directories.
+    """
+
+    def __init__(self, dedupe, index):
+        """Set up instance."""
+        self.dedupe = dedupe
+        self.index = index
+
+    @property
+    def stats(self):
+        """:dict: Return the counters of the duplicate image reply check."""
+        return self.dedupe.stats
+
+    def seen(self, rel_path):
+        """Return True if rel_path is a duplicate image reply."""
+        return self.dedupe.seen(rel_path)
+
+    def new_images(self, field_path, search=""):
+        """Return the new images of a field directory."""
+        return self.index.new_images(field_path, search=search)
+
+    def clear(self):
+        """Forget the seen image paths and the listed images."""
+        self.dedupe.clear()
+        self.index.clear()
@@ -0,0 +1,167 @@
+"""Provide a bounded queue with workers for incoming replies."""
+
+import asyncio
+import logging
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class IngestQueue:
+    """Feed items to a pool of workers through bounded queues.
+
+    Workers are started when items are queued and stop when their
+    queue is empty. Putting an item waits while the queue is full, which
+    applies backpressure to the producer.
+
+    Parameters
+    ----------
+    center : Center instance
+        The Center instance.
+    handler : callable
+        A coroutine function that should accept one item.
+    maxsize : int
+        The maximum number of items to hold per queue.
+    workers : int
+        The maximum number of workers.
+    key_func : callable, optional
+        A function that should accept one item and return a hashable
+        key. Items with the same key are handled in order by the same
+        worker. If not set, items are handled by any free worker.
+    late_threshold : float, optional
+        The number of seconds an item can wait in a queue before it's
+        counted as late.
+
+    Attributes
+    ----------
+    high_water : int
+        The highest number of items that have been queued at once.
+    received : int
+        The number of items that have been queued.
+    processed : int
+        The number of items that have been handled.
+    late : int
+        The number of items that waited longer than late_threshold.
+    dropped : int
+        The number of items that were discarded when or after the queue
+        stopped.
+    """
+
+    # pylint: disable=too-many-arguments, too-many-instance-attributes
+
+    def __init__(
+        self, center, handler, maxsize, workers, key_func=None, late_threshold=10.0
+    ):
+        """Set up instance."""
+        self._center = center
+        self._handler = handler
+        self._key_func = key_func
+        self._late_threshold = late_threshold
+        queue_count = workers if key_func is not None else 1
+        self._queues = [asyncio.Queue(maxsize) for _ in range(queue_count)]
+        self._workers = [None] * workers
+        self.high_water = 0
+        self.received = 0
+        self.processed = 0
+        self.late = 0
+        self.dropped = 0
+        self._stopped = False
+
+    @property
+    def depth(self):
+        """:int: Return the number of items waiting in the queues."""
+        return sum(queue.qsize() for queue in self._queues)
+
+    @property
+    def stats(self):
+        """:dict: Return the counters of the queue."""
+        return {
+            "depth": self.depth,
+            "high_water": self.high_water,
+            "received": self.received,
+            "processed": self.processed,
+            "late": self.late,
+            "dropped": self.dropped,
+        }
+
+    async def put(self, item):
+        """Queue an item and make sure a worker will handle it.
+
+        Items that are put after the queue has stopped are dropped.
+        """
+        if self._stopped:
+            self.dropped += 1
+            return
+        if self._key_func is None:
+            index = 0
+        else:
+            index = hash(self._key_func(item)) % len(self._queues)
+        await self._queues[index].put((time.monotonic(), item))
+        self.received += 1
+        if self._stopped:
+            # The queue stopped while waiting for a free slot.
+            self._drain()
+            return
+        self.high_water = max(self.high_water, self.depth)
+        self._ensure_worker(index)
+
+    def _ensure_worker(self, index):
+        """Start a worker for the queue at index if there's a free slot."""
+        if self._key_func is not None:
+            slots = [index]
+        else:
+            slots = range(len(self._workers))
+        for slot in slots:
+            if self._workers[slot] is None:
+                self._workers[slot] = self._center.create_task(
+                    self._work(slot, self._queues[index])
+                )
+                return
+
+    async def _work(self, slot, queue):
+        """Handle items from queue until it's empty."""
+        try:
+            while True:
+                try:
+                    queued_at, item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                if time.monotonic() - queued_at > self._late_threshold:
+                    self.late += 1
+                try:
+                    await self._handler(item)
+                except asyncio.CancelledError:
+                    self.dropped += 1
+                    raise
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.exception("Error handling queued item %s", item)
+                finally:
+                    queue.task_done()
+                self.processed += 1
+        finally:
+            self._workers[slot] = None
+
+    async def join(self):
+        """Wait until all queued items have been handled or dropped."""
+        for queue in self._queues:
+            await queue.join()
+
+    def _drain(self):
+        """Drop all queued items."""
+        for queue in self._queues:
+            while not queue.empty():
+                queue.get_nowait()
+                queue.task_done()
+                self.dropped += 1
+
+    async def stop(self):
+        """Stop the workers and drop all queued items."""
+        self._stopped = True
+        workers = [worker for worker in self._workers if worker is not None]
+        for worker in workers:
+            worker.cancel()
+        if workers:
+            await asyncio.wait(workers)
+        self._drain()
+        if self.dropped:
+            _LOGGER.warning("Dropped %s queued items on stop", self.dropped)
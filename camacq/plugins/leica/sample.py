@@ -1,18 +1,20 @@
 """Provide sample implementation for leica microscope."""
 
-import json
-
 import voluptuous as vol
 
 from camacq.const import IMAGE_EVENT
+from camacq.helper import select_schema
 from camacq.plugins.sample import (
     BASE_SET_SAMPLE_ACTION_SCHEMA,
     Image,
     ImageContainer,
     Sample,
     SampleEvent,
+    WellGrid,
+    get_matched_samples,
     register_sample,
 )
+from camacq.plugins.sample.well_order import ORDER_ROW
 
 LEICA_SAMPLE_EVENT = "leica_sample_event"
 CHANNEL_EVENT = "channel_event"
@@ -64,14 +66,35 @@ SET_IMAGE_SCHEMA = SET_FIELD_SCHEMA.extend(
     }
 )
 
-SET_SAMPLE_SCHEMA = vol.Any(
-    SET_PLATE_SCHEMA,
-    SET_WELL_SCHEMA,
-    SET_FIELD_SCHEMA,
-    SET_Z_SLICE_SCHEMA,
-    SET_CHANNEL_SCHEMA,
-    SET_IMAGE_SCHEMA,
-)
+# Map container name to the attributes that identify the container.
+CONTAINER_ATTRS = {
+    "plate": ("plate_name",),
+    "well": ("plate_name", "well_x", "well_y"),
+    "field": ("plate_name", "well_x", "well_y", "field_x", "field_y"),
+    "z_slice": ("plate_name", "well_x", "well_y", "z_slice_id"),
+    "channel": ("plate_name", "well_x", "well_y", "channel_id"),
+}
+
+# Map container name to the parent containers that must exist.
+CONTAINER_PARENTS = {
+    "plate": (),
+    "well": ("plate",),
+    "field": ("plate", "well"),
+    "z_slice": ("plate", "well"),
+    "channel": ("plate", "well"),
+    "image": ("plate", "well", "field", "z_slice", "channel"),
+}
+
+CONTAINER_SCHEMAS = {
+    "plate": SET_PLATE_SCHEMA,
+    "well": SET_WELL_SCHEMA,
+    "field": SET_FIELD_SCHEMA,
+    "z_slice": SET_Z_SLICE_SCHEMA,
+    "channel": SET_CHANNEL_SCHEMA,
+    "image": SET_IMAGE_SCHEMA,
+}
+
+SET_SAMPLE_SCHEMA = vol.Schema(select_schema("name", CONTAINER_SCHEMAS))
 
 
 async def setup_module(center, config):
@@ -105,6 +128,10 @@ class LeicaSample(Sample):
         """Set up instance."""
         self._images = images or {}
         self._values = values or {}
+        # Map image path to the containers that index the image.
+        self._image_parents = {}
+        # Map container name and identifying attributes to parent container.
+        self._parents = {}
 
     def __repr__(self):
         """Return the representation."""
@@ -154,65 +181,70 @@ class LeicaSample(Sample):
             channel_id=event.channel_id,
         )
 
+    def _remove_image(self, path):
+        """Remove an image from the sample and the containers of the image."""
+        image = super()._remove_image(path)
+        for parent in self._image_parents.pop(path, ()):
+            parent.remove_image(path)
+        return image
+
+    def _restore_sample(self, name, values, **kwargs):
+        """Return a new image container for restored sample state."""
+        if name != "image":
+            return self._add_parent(CONTAINER_CLASSES[name](values=values, **kwargs))
+        image = Image(values=values, **kwargs)
+        parents = []
+        for parent_name in CONTAINER_PARENTS[name]:
+            parent = self._parents.get(_parent_key(parent_name, kwargs))
+            if parent is not None:
+                parent.add_image(image)
+                parents.append(parent)
+        self._image_parents[image.path] = tuple(parents)
+        return image
+
+    def _add_parent(self, container):
+        """Store a container that can hold images and return it."""
+        key = (
+            container.name,
+            *(getattr(container, attr) for attr in CONTAINER_ATTRS[container.name]),
+        )
+        self._parents[key] = container
+        return container
+
     async def _set_sample(self, name, values, **kwargs):
         """Set an image container of the sample."""
-        sample = None
-
-        if name == "image":
-            params = SET_FIELD_SCHEMA({"name": "field", **kwargs})
-            await self.set_sample(**params)
-            params = SET_Z_SLICE_SCHEMA({"name": "z_slice", **kwargs})
-            await self.set_sample(**params)
-            params = SET_CHANNEL_SCHEMA({"name": "channel", **kwargs})
-            await self.set_sample(**params)
-
-            sample = Image(values=values, **kwargs)
-
-        if name == "field":
-            params = SET_PLATE_SCHEMA({"name": "plate", **kwargs})
-            await self.set_sample(**params)
-            params = SET_WELL_SCHEMA({"name": "well", **kwargs})
-            await self.set_sample(**params)
-
-            sample = Field(self._images, values=values, **kwargs)
-
-        if name == "channel":
-            params = SET_PLATE_SCHEMA({"name": "plate", **kwargs})
-            await self.set_sample(**params)
-            params = SET_WELL_SCHEMA({"name": "well", **kwargs})
-            await self.set_sample(**params)
-
-            sample = Channel(self._images, values=values, **kwargs)
-
-        if name == "z_slice":
-            params = SET_PLATE_SCHEMA({"name": "plate", **kwargs})
-            await self.set_sample(**params)
-            params = SET_WELL_SCHEMA({"name": "well", **kwargs})
-            await self.set_sample(**params)
-
-            sample = ZSlice(self._images, values=values, **kwargs)
-
-        if name == "well":
-            params = SET_PLATE_SCHEMA({"name": "plate", **kwargs})
-            await self.set_sample(**params)
-
-            sample = Well(self._images, values=values, **kwargs)
-
-        if name == "plate":
-            sample = Plate(self._images, values=values, **kwargs)
-
+        parents = []
+        for parent_name in CONTAINER_PARENTS[name]:
+            # Look up existing parents directly to skip validation.
+            parent = self._parents.get(_parent_key(parent_name, kwargs))
+            if parent is None:
+                params = CONTAINER_SCHEMAS[parent_name]({"name": parent_name, **kwargs})
+                parent = await self.set_sample(**params)
+            parents.append(parent)
+
+        if name != "image":
+            return self._add_parent(CONTAINER_CLASSES[name](values=values, **kwargs))
+
+        sample = Image(values=values, **kwargs)
+        # Index the image in its containers.
+        for parent in parents:
+            parent.add_image(sample)
+        self._image_parents[sample.path] = tuple(parents)
         return sample
 
 
 class Plate(ImageContainer):
     """A container for wells.
 
+    The container keeps an index of its own images. The sample adds
+    images to the index when they are set.
+
     Parameters
     ----------
-    images : dict
-        All the images of the sample.
     plate_name: str
         The name of the plate.
+    images : dict
+        Optional dict of images of the container.
     values : dict
         Optional dict of values.
 
@@ -222,11 +254,11 @@ class Plate(ImageContainer):
         The name of the plate.
     """
 
-    def __init__(self, images, plate_name, **kwargs):
+    def __init__(self, plate_name, images=None, values=None):
         """Set up instance."""
-        self._images = images
+        self._images = images or {}
         self.plate_name = plate_name
-        self._values = kwargs.pop("values", {})
+        self._values = values or {}
 
     def __repr__(self):
         """Return the representation."""
@@ -243,11 +275,7 @@ class Plate(ImageContainer):
     @property
     def images(self):
         """:dict: Return a dict with all images for the plate."""
-        return {
-            image.path: image
-            for image in self._images.values()
-            if image.plate_name == self.plate_name
-        }
+        return self._images
 
     @property
     def name(self):
@@ -259,20 +287,28 @@ class Plate(ImageContainer):
         """:dict: Return a dict with the values set for the container."""
         return self._values
 
+    def add_image(self, image):
+        """Add an image to the images of the container."""
+        self._images[image.path] = image
+
+    def remove_image(self, path):
+        """Remove an image from the images of the container."""
+        self._images.pop(path, None)
+
 
 class Well(Plate, ImageContainer):
     """A well within a plate with fields and channels.
 
     Parameters
     ----------
-    images : dict
-        All the images of the sample.
     well_x : int
         x coordinate of the well, minimum 0.
     well_y : int
         y coordinate of the well, minimum 0.
     plate_name: str
         The name of the plate.
+    images : dict
+        Optional dict of images of the container.
     values : dict
         Optional dict of values.
 
@@ -284,13 +320,11 @@ class Well(Plate, ImageContainer):
         Number showing the y coordinate of the well, from 0.
     """
 
-    def __init__(self, images, well_x, well_y, **kwargs):
+    def __init__(self, well_x, well_y, **kwargs):
         """Set up instance."""
-        self._images = images
         self.well_x = well_x
         self.well_y = well_y
-        self._values = kwargs.pop("values", {})
-        super().__init__(images, **kwargs)
+        super().__init__(**kwargs)
 
     def __repr__(self):
         """Return the representation."""
@@ -307,13 +341,7 @@ class Well(Plate, ImageContainer):
     @property
     def images(self):
         """:dict: Return a dict with all images for the well."""
-        return {
-            image.path: image
-            for image in self._images.values()
-            if image.plate_name == self.plate_name
-            and image.well_x == self.well_x
-            and image.well_y == self.well_y
-        }
+        return self._images
 
     @property
     def name(self):
@@ -331,8 +359,6 @@ class Field(Well, ImageContainer):
 
     Parameters
     ----------
-    images : dict
-        All the images of the sample.
     field_x : int
         Coordinate of field in x.
     field_y : int
@@ -343,6 +369,8 @@ class Field(Well, ImageContainer):
         y coordinate of the well, minimum 0.
     plate_name: str
         The name of the plate.
+    images : dict
+        Optional dict of images of the container.
     values : dict
         Optional dict of values.
 
@@ -354,13 +382,11 @@ class Field(Well, ImageContainer):
         Number showing the y coordinate of the field, from 0.
     """
 
-    def __init__(self, images, field_x, field_y, **kwargs):
+    def __init__(self, field_x, field_y, **kwargs):
         """Set up instance."""
-        self._images = images
         self.field_x = field_x
         self.field_y = field_y
-        self._values = kwargs.pop("values", {})
-        super().__init__(images, **kwargs)
+        super().__init__(**kwargs)
 
     def __repr__(self):
         """Return the representation."""
@@ -377,15 +403,7 @@ class Field(Well, ImageContainer):
     @property
     def images(self):
         """:dict: Return a dict with all images for the field."""
-        return {
-            image.path: image
-            for image in self._images.values()
-            if image.plate_name == self.plate_name
-            and image.well_x == self.well_x
-            and image.well_y == self.well_y
-            and image.field_x == self.field_x
-            and image.field_y == self.field_y
-        }
+        return self._images
 
     @property
     def name(self):
@@ -403,8 +421,6 @@ class Channel(Well, ImageContainer):
 
     Parameters
     ----------
-    images : dict
-        All the images of the sample.
     channel_id : int
         ID of the channel.
     well_x : int
@@ -413,6 +429,8 @@ class Channel(Well, ImageContainer):
         y coordinate of the well, minimum 0.
     plate_name: str
         The name of the plate.
+    images : dict
+        Optional dict of images of the container.
     values : dict
         Optional dict of values.
 
@@ -422,12 +440,10 @@ class Channel(Well, ImageContainer):
         Return channel_id of the channel.
     """
 
-    def __init__(self, images, channel_id, **kwargs):
+    def __init__(self, channel_id, **kwargs):
         """Set up instance."""
-        self._images = images
         self.channel_id = channel_id
-        self._values = kwargs.pop("values", {})
-        super().__init__(images, **kwargs)
+        super().__init__(**kwargs)
 
     def __repr__(self):
         """Return the representation."""
@@ -444,14 +460,7 @@ class Channel(Well, ImageContainer):
     @property
     def images(self):
         """:dict: Return a dict with all images for the channel."""
-        return {
-            image.path: image
-            for image in self._images.values()
-            if image.plate_name == self.plate_name
-            and image.well_x == self.well_x
-            and image.well_y == self.well_y
-            and image.channel_id == self.channel_id
-        }
+        return self._images
 
     @property
     def name(self):
@@ -469,8 +478,6 @@ class ZSlice(Well, ImageContainer):
 
     Parameters
     ----------
-    images : dict
-        All the images of the sample.
     z_slice_id : int
         ID of the slice.
     well_x : int
@@ -479,6 +486,8 @@ class ZSlice(Well, ImageContainer):
         y coordinate of the well, minimum 0.
     plate_name: str
         The name of the plate.
+    images : dict
+        Optional dict of images of the container.
     values : dict
         Optional dict of values.
 
@@ -488,12 +497,10 @@ class ZSlice(Well, ImageContainer):
         Return z_slice_id of the channel.
     """
 
-    def __init__(self, images, z_slice_id, **kwargs):
+    def __init__(self, z_slice_id, **kwargs):
         """Set up instance."""
-        self._images = images
         self.z_slice_id = z_slice_id
-        self._values = kwargs.pop("values", {})
-        super().__init__(images, **kwargs)
+        super().__init__(**kwargs)
 
     def __repr__(self):
         """Return the representation."""
@@ -510,14 +517,7 @@ class ZSlice(Well, ImageContainer):
     @property
     def images(self):
         """:dict: Return a dict with all images for the channel."""
-        return {
-            image.path: image
-            for image in self._images.values()
-            if image.plate_name == self.plate_name
-            and image.well_x == self.well_x
-            and image.well_y == self.well_y
-            and image.z_slice_id == self.z_slice_id
-        }
+        return self._images
 
     @property
     def name(self):
@@ -530,6 +530,15 @@ class ZSlice(Well, ImageContainer):
         return self._values
 
 
+CONTAINER_CLASSES = {
+    "plate": Plate,
+    "well": Well,
+    "field": Field,
+    "z_slice": ZSlice,
+    "channel": Channel,
+}
+
+
 class LeicaSampleEvent(SampleEvent):
     """An event produced by a sample change event."""
 
@@ -628,32 +637,30 @@ class ZSliceEvent(WellEvent):
         return self.container.z_slice_id
 
 
-def next_well_xy(sample, plate_name, x_wells=None, y_wells=None):
-    """Return the next not done well for the given plate x, y format."""
-    if json.dumps({"name": "plate", "plate_name": plate_name}) not in sample.data:
+def _parent_key(name, attrs):
+    """Return the key of a parent container from a dict of attributes."""
+    return (name, *map(attrs.get, CONTAINER_ATTRS[name]))
+
+
+def next_well_xy(sample, plate_name, x_wells=None, y_wells=None, order=ORDER_ROW):
+    """Return the next not done well for the given plate x, y format.
+
+    The wells of the plate format are visited in the given well order.
+    See camacq.plugins.sample.well_order for the orders.
+    """
+    if sample.get_sample("plate", plate_name=plate_name) is None:
         return None, None
     if x_wells is None or y_wells is None:
         not_done = (
             (cont.well_x, cont.well_y)
-            for cont in sample.data.values()
-            if cont.name == "well"
-            and cont.plate_name == plate_name
-            and not cont.values.get("well_img_ok", False)
-        )
-    else:
-        done = {
-            (cont.well_x, cont.well_y)
-            for cont in sample.data.values()
-            if cont.name == "well"
-            and cont.plate_name == plate_name
-            and cont.values.get("well_img_ok", False)
-        }
-        not_done = (
-            (x_well, y_well)
-            for x_well in range(x_wells)
-            for y_well in range(y_wells)
-            if (x_well, y_well) not in done
+            for cont in get_matched_samples(
+                sample, "well", attrs={"plate_name": plate_name}
+            )
+            if not cont.values.get("well_img_ok", False)
         )
+        return next(not_done, (None, None))
 
-    x_well, y_well = next(not_done, (None, None))
-    return x_well, y_well
+    grid = sample.well_grids.get(plate_name)
+    if grid is None:
+        grid = sample.well_grids[plate_name] = WellGrid()
+    return grid.next_well(x_wells, y_wells, order)
@@ -0,0 +1,322 @@
+"""Record events to a log file and replay them."""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from functools import partial
+from importlib import import_module
+from itertools import islice
+
+import voluptuous as vol
+
+from camacq.const import CAMACQ_START_EVENT, CAMACQ_STOP_EVENT
+from camacq.event import EXECUTION_FIRE_AND_FORGET, Event
+from camacq.helper import BASE_ACTION_SCHEMA, ensure_dict
+
+_LOGGER = logging.getLogger(__name__)
+ACTION_REPLAY = "replay"
+CONF_FLUSH_INTERVAL = "flush_interval"
+CONF_PATH = "path"
+CONF_REALTIME = "realtime"
+CONF_REPLAY = "replay"
+# The number of records to read from the log file per executor job.
+REPLAY_CHUNK_SIZE = 1000
+# Events that are fired by the center itself are never replayed.
+SKIP_REPLAY_EVENT_TYPES = (CAMACQ_START_EVENT, CAMACQ_STOP_EVENT)
+
+CONFIG_SCHEMA = vol.Schema(
+    vol.All(
+        ensure_dict,
+        {
+            vol.Required(CONF_PATH): vol.Coerce(str),
+            # pylint: disable=no-value-for-parameter
+            vol.Optional(CONF_REPLAY, default=False): vol.Boolean(),
+            vol.Optional(CONF_REALTIME, default=False): vol.Boolean(),
+            vol.Optional(CONF_FLUSH_INTERVAL, default=1.0): vol.Coerce(float),
+        },
+    )
+)
+
+REPLAY_ACTION_SCHEMA = BASE_ACTION_SCHEMA.extend(
+    {
+        vol.Required(CONF_PATH): vol.Coerce(str),
+        # pylint: disable=no-value-for-parameter
+        vol.Optional(CONF_REALTIME, default=False): vol.Boolean(),
+    }
+)
+
+
+async def setup_module(center, config):
+    """Set up the event recorder plugin.
+
+    Parameters
+    ----------
+    center : Center instance
+        The Center instance.
+    config : dict
+        The config dict.
+    """
+    conf = config["recorder"]
+    path = conf[CONF_PATH]
+
+    async def handle_action(**kwargs):
+        """Handle the action call to replay events from a log file.
+
+        Parameters
+        ----------
+        **kwargs
+            Arbitrary keyword arguments. These will be passed to the
+            action function when an action is called.
+        """
+        await replay_events(center, kwargs[CONF_PATH], kwargs[CONF_REALTIME])
+
+    center.actions.register(
+        "recorder", ACTION_REPLAY, handle_action, REPLAY_ACTION_SCHEMA
+    )
+
+    if conf[CONF_REPLAY]:
+
+        async def replay_on_start(center, event):
+            """Replay the event log when camacq has started."""
+            await replay_events(center, path, conf[CONF_REALTIME])
+
+        center.bus.register(
+            CAMACQ_START_EVENT, replay_on_start, EXECUTION_FIRE_AND_FORGET
+        )
+        return
+
+    recorder = EventRecorder(center, path, conf[CONF_FLUSH_INTERVAL])
+    await recorder.start()
+
+    async def stop_recorder(center, event):
+        """Stop the recorder when camacq is about to stop."""
+        await recorder.stop()
+
+    center.bus.register(CAMACQ_STOP_EVENT, stop_recorder)
+
+
+class EventRecorder:
+    """Record all notified events to an append-only log file.
+
+    Each event is written as one line of JSON with the monotonic time,
+    the notify depth, the event class and the event data.
+
+    Parameters
+    ----------
+    center : Center instance
+        The Center instance.
+    path : str
+        The path to the log file.
+    flush_interval : float
+        The number of seconds to buffer events before writing them.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, center, path, flush_interval):
+        """Set up instance."""
+        self._center = center
+        self._path = path
+        self._flush_interval = flush_interval
+        self._buffer = []
+        self._file = None
+        self._flush_lock = asyncio.Lock()
+        self._remove_observer = None
+        self._timer = None
+
+    async def start(self):
+        """Open the log file and start recording."""
+        self._file = await self._center.add_executor_job(
+            partial(open, self._path, "a", encoding="utf-8")
+        )
+        self._remove_observer = self._center.bus.add_observer(self.record)
+        _LOGGER.info("Recording events to %s", self._path)
+
+    def record(self, event, depth):
+        """Buffer an event to be written to the log file."""
+        event_class = type(event)
+        record = {
+            "time": time.monotonic(),
+            "depth": depth,
+            "event": f"{event_class.__module__}:{event_class.__qualname__}",
+            "data": event.data,
+        }
+        self._buffer.append(
+            json.dumps(record, separators=(",", ":"), default=_encode_value)
+        )
+        if self._timer is None:
+            self._timer = self._center.loop.call_later(
+                self._flush_interval, self._schedule_flush
+            )
+
+    def _schedule_flush(self):
+        """Schedule writing the buffered events."""
+        self._timer = None
+        self._center.create_task(self.flush())
+
+    async def flush(self):
+        """Write the buffered events to the log file."""
+        async with self._flush_lock:
+            lines, self._buffer = self._buffer, []
+            if lines:
+                await self._center.add_executor_job(self._write, lines)
+
+    def _write(self, lines):
+        """Write lines to the log file."""
+        self._file.write("\n".join(lines) + "\n")
+        self._file.flush()
+
+    async def stop(self):
+        """Stop recording and close the log file."""
+        if self._remove_observer is not None:
+            self._remove_observer()
+            self._remove_observer = None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self.flush()
+        if self._file is not None:
+            await self._center.add_executor_job(self._file.close)
+            self._file = None
+
+
+def _encode_value(value):
+    """Return a JSON serializable value for value."""
+    if isinstance(value, os.PathLike):
+        return os.fspath(value)
+    return f"<{type(value).__name__}>"
+
+
+def load_records(path):
+    """Load event records from a log file.
+
+    An incomplete last line, eg from a crash, is skipped.
+
+    Parameters
+    ----------
+    path : str
+        The path to the log file.
+
+    Returns
+    -------
+    list
+        Return a list of dicts with the event records.
+    """
+    with open(path, encoding="utf-8") as log_file:
+        return list(iter_records(log_file))
+
+
+def iter_records(log_file):
+    """Yield event records from an open log file.
+
+    Invalid lines, eg an incomplete last line from a crash, are skipped.
+
+    Parameters
+    ----------
+    log_file : file object
+        The log file opened for reading text.
+
+    Yields
+    ------
+    dict
+        Yield a dict per event record.
+    """
+    for line in log_file:
+        try:
+            yield json.loads(line)
+        except ValueError:
+            _LOGGER.warning("Skipping invalid event record: %s", line)
+
+
+def read_chunk(records, size):
+    """Return a list of at most size records from a records iterator."""
+    return list(islice(records, size))
+
+
+def get_event_class(name):
+    """Return an event class from a name of the form module:qualname."""
+    module_name, _, qualname = name.partition(":")
+    try:
+        obj = import_module(module_name)
+        for attr in qualname.split("."):
+            obj = getattr(obj, attr)
+    except (AttributeError, ImportError):
+        return None
+    if not isinstance(obj, type) or not issubclass(obj, Event):
+        return None
+    return obj
+
+
+async def replay_events(center, path, realtime=False):
+    """Replay recorded events from a log file.
+
+    Only events that were not fired by an event handler are replayed, as
+    the handlers in the center will fire the rest again.
+
+    Parameters
+    ----------
+    center : Center instance
+        The Center instance.
+    path : str
+        The path to the log file.
+    realtime : bool
+        If True replay the events with the recorded pacing, else replay
+        them as fast as possible.
+
+    Returns
+    -------
+    int
+        Return the number of replayed events.
+    """
+    try:
+        log_file = await center.add_executor_job(partial(open, path, encoding="utf-8"))
+    except OSError as exc:
+        _LOGGER.error("Failed to load event log %s: %s", path, exc)
+        return 0
+    _LOGGER.info("Replaying events from %s", path)
+    start = time.monotonic()
+    try:
+        replayed = await _replay_records(center, iter_records(log_file), realtime)
+    finally:
+        await center.add_executor_job(log_file.close)
+    _LOGGER.info(
+        "Replayed %s events in %.3f seconds", replayed, time.monotonic() - start
+    )
+    return replayed
+
+
+async def _replay_records(center, records, realtime):
+    """Replay records that are read in chunks in the executor.
+
+    Return the number of replayed events.
+    """
+    event_classes = {}
+    replayed = 0
+    start = time.monotonic()
+    first_time = None
+    while chunk := await center.add_executor_job(
+        read_chunk, records, REPLAY_CHUNK_SIZE
+    ):
+        for record in chunk:
+            if record["depth"]:
+                continue
+            name = record["event"]
+            if name not in event_classes:
+                event_classes[name] = get_event_class(name)
+            event_class = event_classes[name]
+            if event_class is None:
+                _LOGGER.warning("Skipping event with unknown class %s", name)
+                continue
+            if event_class.event_type in SKIP_REPLAY_EVENT_TYPES:
+                continue
+            if realtime:
+                if first_time is None:
+                    first_time = record["time"]
+                delay = record["time"] - first_time - (time.monotonic() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await center.bus.notify(event_class(record["data"]))
+            replayed += 1
+    return replayed
@@ -46,14 +46,11 @@ async def setup_module(center, config):
         if not result:
             return
         sample = center.samples[sample_name]
-        image = sample.images.pop(old_path, None)
+        image = sample.remove_image(old_path)
         if image is None:
             return
-        image_attrs = image.__dict__.copy()
-        image_attrs.pop("_path")
-        image_attrs.pop("_values")
         await sample.set_sample(
-            image.name, path=new_path, values=image.values, **image_attrs
+            image.name, path=new_path, values=dict(image.values), **image.attrs
         )
 
     rename_image_action_schema = vol.All(
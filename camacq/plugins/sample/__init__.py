@@ -4,28 +4,124 @@ import asyncio
 import json
 import logging
 from abc import ABC, abstractmethod
+from collections import namedtuple
+from contextlib import contextmanager
+from itertools import count
+from operator import itemgetter
+from types import MappingProxyType
 
+import numpy as np
 import voluptuous as vol
 
+from camacq.const import CAMACQ_START_EVENT, CAMACQ_STOP_EVENT
 from camacq.event import Event
 from camacq.exceptions import SampleError
-from camacq.helper import BASE_ACTION_SCHEMA
+from camacq.helper import BASE_ACTION_SCHEMA, ensure_dict
 from camacq.util import dotdict
 
+from .coalesce import EventCoalescer
+from .export import EXPORT_CSV, EXPORT_WRITERS, SampleSnapshot, export_snapshot
+from .journal import SampleJournal
+from .well_order import ORDER_ROW, well_order, well_positions
+
 _LOGGER = logging.getLogger(__name__)
+CONF_COALESCE = "coalesce"
+CONF_FLUSH_INTERVAL = "flush_interval"
+CONF_JOURNAL = "journal"
+CONF_PATH = "path"
+CONF_SNAPSHOT_INTERVAL = "snapshot_interval"
+CONF_WINDOW = "window"
+SAMPLE_COALESCER = "sample_coalescer"
 SAMPLE_EVENT = "sample_event"
 SAMPLE_IMAGE_SET_EVENT = "sample_image_set_event"
+SAMPLE_JOURNAL = "sample_journal"
+NO_VALUES = MappingProxyType({})
+# The image attributes that are stored in slots.
+IMAGE_ATTRS = (
+    "plate_name",
+    "well_x",
+    "well_y",
+    "field_x",
+    "field_y",
+    "z_slice_id",
+    "channel_id",
+)
+
+CONFIG_SCHEMA = vol.Schema(
+    vol.All(
+        ensure_dict,
+        {
+            vol.Optional(CONF_COALESCE): {
+                vol.Optional(CONF_WINDOW, default=0.0): vol.All(
+                    vol.Coerce(float), vol.Range(min=0)
+                ),
+            },
+            vol.Optional(CONF_JOURNAL): {
+                vol.Required(CONF_PATH): vol.Coerce(str),
+                vol.Optional(CONF_FLUSH_INTERVAL, default=1.0): vol.Coerce(float),
+                vol.Optional(CONF_SNAPSHOT_INTERVAL, default=10000): vol.All(
+                    vol.Coerce(int), vol.Range(min=1)
+                ),
+            },
+        },
+    )
+)
 
+ACTION_EXPORT = "export"
 ACTION_SET_SAMPLE = "set_sample"
+ACTION_SET_SAMPLES = "set_samples"
 SET_SAMPLE_ACTION_SCHEMA = BASE_ACTION_SCHEMA.extend(
     {"sample_name": vol.Coerce(str)}, extra=vol.ALLOW_EXTRA
 )
+EXPORT_ACTION_SCHEMA = BASE_ACTION_SCHEMA.extend(
+    {
+        vol.Required("sample_name"): vol.Coerce(str),
+        vol.Required("path"): vol.Coerce(str),
+        vol.Optional("format", default=EXPORT_CSV): vol.In(list(EXPORT_WRITERS)),
+    }
+)
+SET_SAMPLES_ACTION_SCHEMA = BASE_ACTION_SCHEMA.extend(
+    {"sample_name": vol.Coerce(str), vol.Required("samples"): [dict]}
+)
 BASE_SET_SAMPLE_ACTION_SCHEMA = BASE_ACTION_SCHEMA.extend(
     {vol.Required("name"): vol.Coerce(str), "values": dict}
 )
 
+
+def _validate_export(sample, kwargs):
+    """Return export parameters for a sample."""
+    return {"path": kwargs["path"], "export_format": kwargs["format"]}
+
+
+def _validate_set_sample(sample, kwargs):
+    """Return validated set_sample parameters for a sample."""
+    return sample.set_sample_schema(kwargs)
+
+
+def _validate_set_samples(sample, kwargs):
+    """Return validated set_samples parameters for a sample.
+
+    All containers are validated before any of them is set.
+    """
+    return {"samples": [sample.set_sample_schema(item) for item in kwargs["samples"]]}
+
+
 ACTION_TO_METHOD = {
-    ACTION_SET_SAMPLE: {"method": "set_sample", "schema": SET_SAMPLE_ACTION_SCHEMA},
+    ACTION_EXPORT: {
+        "method": "export",
+        "schema": EXPORT_ACTION_SCHEMA,
+        "validate": _validate_export,
+    },
+    ACTION_SET_SAMPLE: {
+        "method": "set_sample",
+        "schema": SET_SAMPLE_ACTION_SCHEMA,
+        "validate": _validate_set_sample,
+    },
+    ACTION_SET_SAMPLES: {
+        "method": "set_samples",
+        "schema": SET_SAMPLES_ACTION_SCHEMA,
+        "validate": _validate_set_samples,
+    },
 }
 
 
@@ -51,6 +147,7 @@ async def setup_module(center, config):
         """
         action_id = kwargs.pop("action_id")
         method = ACTION_TO_METHOD[action_id]["method"]
+        validate = ACTION_TO_METHOD[action_id]["validate"]
         sample_name = kwargs.pop("sample_name", None)
         silent = kwargs.pop("silent", False)
         if sample_name:
@@ -60,7 +157,7 @@ async def setup_module(center, config):
         tasks = []
         for sample in samples:
             try:
-                kwargs = sample.set_sample_schema(kwargs)
+                params = validate(sample, kwargs)
             except vol.Invalid as exc:
                 _LOGGER.log(
                     logging.DEBUG if silent else logging.ERROR,
@@ -73,9 +170,9 @@ async def setup_module(center, config):
                 continue
 
             _LOGGER.debug(
-                "Handle sample %s action %s: %s", sample.name, action_id, kwargs
+                "Handle sample %s action %s: %s", sample.name, action_id, params
             )
-            tasks.append(center.create_task(getattr(sample, method)(**kwargs)))
+            tasks.append(center.create_task(getattr(sample, method)(**params)))
         if tasks:
             await asyncio.wait(tasks)
 
@@ -83,6 +180,71 @@ async def setup_module(center, config):
         schema = options["schema"]
         center.actions.register("sample", action_id, handle_action, schema)
 
+    conf = config["sample"]
+    if CONF_COALESCE in conf:
+        setup_coalescer(center, conf[CONF_COALESCE])
+    if CONF_JOURNAL in conf:
+        await setup_journal(center, conf[CONF_JOURNAL])
+
+
+def setup_coalescer(center, conf):
+    """Set up coalescing of sample change events.
+
+    Updates that don't change the values of a container don't fire an
+    event. Events of the same container within the window are merged.
+
+    Parameters
+    ----------
+    center : Center instance
+        The Center instance.
+    conf : dict
+        The coalesce config dict.
+    """
+    coalescer = EventCoalescer(center, conf[CONF_WINDOW])
+    center.data[SAMPLE_COALESCER] = coalescer
+    for sample in center.samples.values():
+        sample.coalescer = coalescer
+
+    async def stop_coalescer(center, event):
+        """Fire the pending events when camacq is about to stop."""
+        await coalescer.stop()
+
+    center.bus.register(CAMACQ_STOP_EVENT, stop_coalescer)
+
+
+async def setup_journal(center, conf):
+    """Set up the sample journal.
+
+    The samples are restored from the journal when camacq starts, before
+    other start event handlers run.
+
+    Parameters
+    ----------
+    center : Center instance
+        The Center instance.
+    conf : dict
+        The journal config dict.
+    """
+    journal = SampleJournal(
+        center, conf[CONF_PATH], conf[CONF_FLUSH_INTERVAL], conf[CONF_SNAPSHOT_INTERVAL]
+    )
+    center.data[SAMPLE_JOURNAL] = journal
+    for sample in center.samples.values():
+        sample.journal = journal
+
+    async def restore_samples(center, event):
+        """Restore the samples and compact the journal."""
+        await journal.restore()
+        await journal.start()
+        await journal.snapshot()
+
+    async def stop_journal(center, event):
+        """Write the journal when camacq is about to stop."""
+        await journal.stop()
+
+    center.bus.register(CAMACQ_START_EVENT, restore_samples)
+    center.bus.register(CAMACQ_STOP_EVENT, stop_journal)
+
 
 class Samples(dotdict):
     """Hold all samples."""
@@ -97,10 +259,89 @@ class Samples(dotdict):
             raise SampleError(f"Unable to get sample with name {sample_name}") from exc
 
 
+# Map a tuple of attribute names in any order to the shared sorted tuple.
+_ATTR_NAMES = {}
+
+
+class ContainerKey(namedtuple("ContainerKey", ("name", "attr_names", "attr_values"))):
+    """Identify an image container by name and identifying attributes.
+
+    The attribute names are stored sorted, with the attribute values in
+    the same order, so the key does not depend on the order that the
+    attributes are given in. Equal tuples of attribute names are shared
+    between keys to save memory.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def create(cls, name, attrs):
+        """Return a key for a container name and a dict of attributes."""
+        given_names = tuple(attrs)
+        attr_names = _ATTR_NAMES.get(given_names)
+        if attr_names is None:
+            sorted_names = tuple(sorted(given_names))
+            attr_names = _ATTR_NAMES.setdefault(sorted_names, sorted_names)
+            _ATTR_NAMES[given_names] = attr_names
+        return cls(name, attr_names, tuple(map(attrs.__getitem__, attr_names)))
+
+    @classmethod
+    def from_string(cls, id_string):
+        """Return a key for a JSON id string of the container attributes."""
+        attrs = json.loads(id_string)
+        name = attrs.pop("name")
+        return cls.create(name, attrs)
+
+    @property
+    def attrs(self):
+        """:tuple: Return tuples of attribute name and value, sorted by name."""
+        return tuple(zip(self.attr_names, self.attr_values))
+
+    def to_dict(self):
+        """Return a dict with the container name and attributes."""
+        return {"name": self.name, **dict(zip(self.attr_names, self.attr_values))}
+
+
+class SampleData(dict):
+    """Map container keys to the image containers of a sample.
+
+    For compatibility, a JSON id string with the container name and
+    attributes can be used instead of a container key to look up a
+    container, eg in templates.
+    """
+
+    def __missing__(self, key):
+        """Look up a container by JSON id string."""
+        if not isinstance(key, str):
+            raise KeyError(key)
+        try:
+            container_key = ContainerKey.from_string(key)
+        except (AttributeError, KeyError, TypeError, ValueError) as exc:
+            raise KeyError(key) from exc
+        return self[container_key]
+
+    def __contains__(self, key):
+        """Return True if a container with key exists."""
+        return self.get(key) is not None
+
+    def get(self, key, default=None):
+        """Return the container with key or default if not found."""
+        if isinstance(key, str):
+            try:
+                return self[key]
+            except KeyError:
+                return default
+        return super().get(key, default)
+
+
 def register_sample(center, sample):
     """Register sample."""
     sample.center = center
-    sample.data = {}
+    sample.coalescer = center.data.get(SAMPLE_COALESCER)
+    sample.data = SampleData()
+    sample.index = SampleIndex()
+    sample.journal = center.data.get(SAMPLE_JOURNAL)
+    sample.well_grids = {}
     center.bus.register(sample.image_event_type, sample.on_image)
     center.samples[sample.name] = sample
 
@@ -108,6 +349,8 @@ def register_sample(center, sample):
 class ImageContainer(ABC):
     """A container for images."""
 
+    __slots__ = ()
+
     @property
     @abstractmethod
     def change_event(self):
@@ -128,12 +371,24 @@ class ImageContainer(ABC):
     def values(self):
         """:dict: Return a dict with the values set for the container."""
 
+    def update_values(self, values):
+        """Update the values of the container with a dict of values."""
+        self.values.update(values)
+
 
 class Sample(ImageContainer, ABC):
     """Representation of the state of the sample."""
 
     center = None
+    coalescer = None
     data = None
+    index = None
+    journal = None
+    well_grids = None
+    # Map container key to the change event of a running batch.
+    _batch_events = None
+    # The snapshots in use that need old values before a change.
+    _snapshots = ()
 
     @property
     @abstractmethod
@@ -163,15 +418,14 @@ class Sample(ImageContainer, ABC):
             The name of the container type.
         **kwargs
             Arbitrary keyword arguments.
-            These will be used to create the id string of the container.
+            These will be used to create the key of the container.
 
         Returns
         -------
         ImageContainer instance
             Return the found ImageContainer instance.
         """
-        id_string = json.dumps({"name": name, **kwargs})
-        return self.data.get(id_string)
+        return self.data.get(ContainerKey.create(name, kwargs))
 
     async def set_sample(self, name, values=None, **kwargs):
         """Set an image container of the sample.
@@ -184,37 +438,218 @@ class Sample(ImageContainer, ABC):
             The optional values to set on the container.
         **kwargs
             Arbitrary keyword arguments.
-            These will be used to create the id string of the container.
+            These will be used to create the key of the container.
 
         Returns
         -------
         ImageContainer instance
             Return the ImageContainer instance that was updated.
         """
-        id_string = json.dumps({"name": name, **kwargs})
+        if self.journal is not None and self.journal.restoring:
+            await self.journal.wait_restored()
+        key = ContainerKey.create(name, kwargs)
         values = values or {}
-        container = self.data.get(id_string)
+        container = self.data.get(key)
         event = None
 
         if container is None:
             container = await self._set_sample(name, values, **kwargs)
             event_class = container.change_event
             event = event_class({"container": container})
-
-        container.values.update(values)
-        self.data[id_string] = container
-
-        if name == "image":
-            self.images[container.path] = container
-
-        if not event and values:
+        elif values and (
+            self.coalescer is None or _values_changed(container.values, values)
+        ):
             event_class = container.change_event
             event = event_class({"container": container})
 
+        self._store_sample(key, container, values)
+
         if event:
-            await self.center.bus.notify(event)
+            if self.journal is not None:
+                self.journal.record(self.name, key, values)
+            if self._batch_events is not None:
+                self._batch_events.setdefault(key, event)
+            else:
+                await self._fire_event(key, event)
         return container
 
+    async def _fire_event(self, key, event):
+        """Fire a change event of the container with key."""
+        if self.coalescer is None:
+            await self.center.bus.notify(event)
+        else:
+            await self.coalescer.add((self.name, key), event)
+
+    async def set_samples(self, samples):
+        """Set many image containers of the sample.
+
+        The change events are fired after all containers are set, with
+        one event per new or updated container.
+
+        Parameters
+        ----------
+        samples : list
+            A list of dicts with the keyword arguments of set_sample for
+            each container.
+
+        Returns
+        -------
+        list
+            Return a list of the ImageContainer instances that were updated.
+        """
+        batch = self._batch_events is None
+        if batch:
+            self._batch_events = {}
+        events = self._batch_events
+        try:
+            containers = [await self.set_sample(**params) for params in samples]
+        finally:
+            if batch:
+                self._batch_events = None
+        if batch:
+            for key, event in events.items():
+                await self._fire_event(key, event)
+        return containers
+
+    @contextmanager
+    def snapshot(self):
+        """Return a context manager with a snapshot of the sample containers.
+
+        The snapshot keeps the values that the containers had when it was
+        taken, until the context is exited.
+
+        Yields
+        ------
+        SampleSnapshot instance
+            The snapshot of the sample containers.
+        """
+        snapshot = SampleSnapshot(list(self.data.items()))
+        self._snapshots = (*self._snapshots, snapshot)
+        try:
+            yield snapshot
+        finally:
+            self._snapshots = tuple(
+                other for other in self._snapshots if other is not snapshot
+            )
+
+    async def export(self, path, export_format=EXPORT_CSV):
+        """Export the containers of the sample to a file.
+
+        The containers are exported as they were when the export started.
+        The file is written in chunks in the executor.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file to write.
+        export_format : str
+            The file format, csv or jsonl.
+
+        Returns
+        -------
+        int
+            Return the number of exported containers.
+        """
+        with self.snapshot() as snapshot:
+            exported = await export_snapshot(self.center, snapshot, path, export_format)
+        _LOGGER.info(
+            "Exported %s containers of sample %s to %s", exported, self.name, path
+        )
+        return exported
+
+    def _store_sample(self, key, container, values):
+        """Store a container with updated values in the sample state."""
+        if values:
+            for snapshot in self._snapshots:
+                snapshot.preserve(key, container)
+            self.index.update_values(key, container, values)
+            container.update_values(values)
+        self.data[key] = container
+        self.index.add(key, container)
+
+        if container.name == "image":
+            self.images[container.path] = container
+
+        if container.name == "well":
+            grid = self.well_grids.get(container.plate_name)
+            if grid is None:
+                grid = self.well_grids[container.plate_name] = WellGrid()
+            grid.set_done(
+                container.well_x,
+                container.well_y,
+                container.values.get("well_img_ok", False),
+            )
+
+    def restore(self, records):
+        """Restore image containers without validation or change events.
+
+        Parameters
+        ----------
+        records : iterable
+            An iterable of tuples of a dict with the container name and
+            attributes and the values to set on the container. Parent
+            containers must come before their children. The values are
+            None for a removed image.
+        """
+        for attrs, values in records:
+            if values is None:
+                self._remove_image(attrs["path"])
+                continue
+            attrs = dict(attrs)
+            name = attrs.pop("name")
+            key = ContainerKey.create(name, attrs)
+            container = self.data.get(key)
+            if container is None:
+                container = self._restore_sample(name, values, **attrs)
+            self._store_sample(key, container, values)
+
+    def _restore_sample(self, name, values, **kwargs):
+        """Return a new image container for restored sample state.
+
+        Parameters
+        ----------
+        name : str
+            The name of the container type.
+        values : dict
+            The values to set on the container.
+        **kwargs
+            Arbitrary keyword arguments.
+
+        Returns
+        -------
+        ImageContainer instance
+            Return the new ImageContainer instance.
+        """
+        raise NotImplementedError(f"Sample {self.name} does not support restore")
+
+    def remove_image(self, path):
+        """Remove an image from the sample state.
+
+        Parameters
+        ----------
+        path : str
+            The path of the image.
+
+        Returns
+        -------
+        Image instance
+            Return the removed Image instance or None if not found.
+        """
+        image = self._remove_image(path)
+        if image is not None and self.journal is not None:
+            self.journal.record(self.name, _image_key(image), None)
+        return image
+
+    def _remove_image(self, path):
+        """Remove an image from the sample state and return it."""
+        image = self.images.pop(path, None)
+        if image is None:
+            return None
+        key = _image_key(image)
+        self.data.pop(key, None)
+        self.index.remove(key, image)
+        return image
+
     @abstractmethod
     async def _set_sample(self, name, values, **kwargs):
         """Set an image container of the sample.
@@ -236,18 +671,34 @@ class Sample(ImageContainer, ABC):
 
 
 class Image(ImageContainer):
-    """An image with path and position info."""
+    """An image with path and position info.
+
+    The position attributes are stored in slots. Other attributes are
+    stored in the instance dict, which is only created when needed. The
+    values dict is also created when values are first set.
+    """
+
+    __slots__ = ("_path", "_values", *IMAGE_ATTRS, "__dict__")
 
     def __init__(self, path, values=None, **kwargs):
         """Set up instance."""
         self._path = path
-        self._values = values or {}
+        self._values = values or None
         for attr, val in kwargs.items():
             setattr(self, attr, val)
 
     def __repr__(self):
         """Return the representation."""
-        return f"<Image(path={self.path}, values={self.values})>"
+        return f"<Image(path={self.path}, values={self._values or {}})>"
+
+    @property
+    def attrs(self):
+        """:dict: Return a dict with the attributes of the image except path."""
+        attrs = {
+            attr: getattr(self, attr) for attr in IMAGE_ATTRS if hasattr(self, attr)
+        }
+        attrs.update(self.__dict__)
+        return attrs
 
     @property
     def change_event(self):
@@ -271,9 +722,20 @@ class Image(ImageContainer):
 
     @property
     def values(self):
-        """:dict: Return a dict with the values set for the container."""
+        """:dict: Return a dict with the values set for the container.
+
+        The dict is read only until values are set on the image.
+        """
+        if self._values is None:
+            return NO_VALUES
         return self._values
 
+    def update_values(self, values):
+        """Update the values of the image with a dict of values."""
+        if self._values is None:
+            self._values = {}
+        self._values.update(values)
+
 
 class SampleEvent(Event):
     """An event produced by a sample change event."""
@@ -316,21 +778,210 @@ class SampleImageSetEvent(SampleEvent):
     event_type = SAMPLE_IMAGE_SET_EVENT
 
 
+class SampleIndex:
+    """Index the containers of a sample by name, attributes and values.
+
+    An attribute or value index is built the first time a query uses it
+    and is then kept up to date when containers are added and when their
+    values are set via the sample. Values must not be changed directly on
+    the container values dict.
+    """
+
+    def __init__(self):
+        """Set up instance."""
+        self._counter = count()
+        # Map container key to insertion order.
+        self._order = {}
+        # Map container name to container key to container.
+        self._names = {}
+        # Map container name to attribute names to attribute values to
+        # container key to container.
+        self._attrs = {}
+        # Map container name to value key to value to container key to container.
+        self._values = {}
+
+    def add(self, container_key, container):
+        """Add a container to the indexes if it's not already added."""
+        if container_key in self._order:
+            return
+        self._order[container_key] = next(self._counter)
+        name = container.name
+        self._names.setdefault(name, {})[container_key] = container
+        for attr_names, index in self._attrs.get(name, {}).items():
+            key = _attrs_key(container, attr_names)
+            index.setdefault(key, {})[container_key] = container
+        for key, index in self._values.get(name, {}).items():
+            value = _hashable(container.values.get(key))
+            index.setdefault(value, {})[container_key] = container
+
+    def remove(self, container_key, container):
+        """Remove a container from the indexes."""
+        if self._order.pop(container_key, None) is None:
+            return
+        name = container.name
+        self._names.get(name, {}).pop(container_key, None)
+        for attr_names, index in self._attrs.get(name, {}).items():
+            _remove_from_bucket(index, _attrs_key(container, attr_names), container_key)
+        for key, index in self._values.get(name, {}).items():
+            value = _hashable(container.values.get(key))
+            _remove_from_bucket(index, value, container_key)
+
+    def update_values(self, container_key, container, values):
+        """Update the value indexes before values are set on a container."""
+        if container_key not in self._order:
+            return
+        for key, index in self._values.get(container.name, {}).items():
+            if key not in values:
+                continue
+            old_value = _hashable(container.values.get(key))
+            new_value = _hashable(values[key])
+            if old_value == new_value:
+                continue
+            _remove_from_bucket(index, old_value, container_key)
+            index.setdefault(new_value, {})[container_key] = container
+
+    def _attr_index(self, name, attr_names):
+        """Return the attribute index for name and attribute names."""
+        indexes = self._attrs.setdefault(name, {})
+        if attr_names not in indexes:
+            index = indexes[attr_names] = {}
+            for container_key, container in self._names.get(name, {}).items():
+                key = _attrs_key(container, attr_names)
+                index.setdefault(key, {})[container_key] = container
+        return indexes[attr_names]
+
+    def _value_index(self, name, key):
+        """Return the value index for name and value key."""
+        indexes = self._values.setdefault(name, {})
+        if key not in indexes:
+            index = indexes[key] = {}
+            for container_key, container in self._names.get(name, {}).items():
+                value = _hashable(container.values.get(key))
+                index.setdefault(value, {})[container_key] = container
+        return indexes[key]
+
+    def match(self, name, attrs, values):
+        """Return a list of the containers that match.
+
+        The containers are returned in the order they were added.
+        """
+        buckets = [self._names.get(name, {})]
+        if attrs:
+            attr_names = tuple(sorted(attrs))
+            key = tuple(attrs[attr] for attr in attr_names)
+            if _is_hashable(key):
+                buckets.append(self._attr_index(name, attr_names).get(key, {}))
+        for value_key, value in values.items():
+            if _is_hashable(value):
+                buckets.append(self._value_index(name, value_key).get(value, {}))
+        candidates = min(buckets, key=len)
+        items = [
+            (self._order[container_key], cont)
+            for container_key, cont in candidates.items()
+            if all(getattr(cont, attr, None) == val for attr, val in attrs.items())
+            and all(cont.values.get(key) == val for key, val in values.items())
+        ]
+        items.sort(key=itemgetter(0))
+        return [cont for _, cont in items]
+
+
+class WellGrid:
+    """Track the done wells of a plate in a boolean grid.
+
+    A cursor per plate format and well order points at the first well
+    that may not be done, so finding the next not done well is O(1)
+    amortized.
+    """
+
+    def __init__(self):
+        """Set up instance."""
+        self._done = np.zeros((0, 0), dtype=bool)
+        # Map plate format and order (x_wells, y_wells, order) to the
+        # position of the next well in the well order.
+        self._cursors = {}
+
+    def is_done(self, well_x, well_y):
+        """Return True if the well is done."""
+        x_size, y_size = self._done.shape
+        return well_x < x_size and well_y < y_size and bool(self._done[well_x, well_y])
+
+    def set_done(self, well_x, well_y, done):
+        """Set the done state of a well."""
+        done = bool(done)
+        if self.is_done(well_x, well_y) == done:
+            return
+        x_size, y_size = self._done.shape
+        if well_x >= x_size or well_y >= y_size:
+            grid = np.zeros(
+                (max(well_x + 1, 2 * x_size), max(well_y + 1, 2 * y_size)), dtype=bool
+            )
+            grid[:x_size, :y_size] = self._done
+            self._done = grid
+        self._done[well_x, well_y] = done
+        if done:
+            return
+        for (x_wells, y_wells, order), cursor in self._cursors.items():
+            if well_x < x_wells and well_y < y_wells:
+                position = well_positions(x_wells, y_wells, order)[well_x, well_y]
+                if position < cursor:
+                    self._cursors[x_wells, y_wells, order] = position
+
+    def next_well(self, x_wells, y_wells, order=ORDER_ROW):
+        """Return the next not done well for the plate x, y format."""
+        wells = well_order(x_wells, y_wells, order)
+        cursor = self._cursors.get((x_wells, y_wells, order), 0)
+        total = len(wells)
+        while cursor < total and self.is_done(*wells[cursor]):
+            cursor += 1
+        self._cursors[x_wells, y_wells, order] = cursor
+        if cursor >= total:
+            return None, None
+        return wells[cursor]
+
+
+_UNHASHABLE = object()
+
+
+def _remove_from_bucket(index, key, container_key):
+    """Remove a container key from the bucket of an index key."""
+    bucket = index.get(key, {})
+    bucket.pop(container_key, None)
+    if not bucket:
+        index.pop(key, None)
+
+
+def _image_key(image):
+    """Return the container key of an image."""
+    return ContainerKey.create(image.name, {"path": image.path, **image.attrs})
+
+
+def _values_changed(old_values, values):
+    """Return True if setting values would change old_values."""
+    return any(
+        key not in old_values or old_values[key] != value
+        for key, value in values.items()
+    )
+
+
+def _is_hashable(value):
+    """Return True if value is hashable."""
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+def _hashable(value):
+    """Return value if it's hashable, else a marker for unhashable values."""
+    return value if _is_hashable(value) else _UNHASHABLE
+
+
+def _attrs_key(container, attr_names):
+    """Return the hashable attribute values of container for attr_names."""
+    return _hashable(tuple(getattr(container, attr, None) for attr in attr_names))
+
+
 def get_matched_samples(sample, name, attrs=None, values=None):
     """Return the sample items that match."""
-    attrs = attrs or {}
-    values = values or {}
-    items = [
-        cont
-        for cont in sample.data.values()
-        if cont.name == name
-        and (
-            not attrs
-            or all(getattr(cont, attr, None) == val for attr, val in attrs.items())
-        )
-        and (
-            not values
-            or all(cont.values.get(key) == val for key, val in values.items())
-        )
-    ]
-    return items
+    return sample.index.match(name, attrs or {}, values or {})
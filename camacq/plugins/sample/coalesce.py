@@ -0,0 +1,67 @@
+"""Coalesce sample change events."""
+
+import asyncio
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class EventCoalescer:
+    """Merge the change events of a container within a time window.
+
+    The first change event of a container starts a window if none is
+    running. Further events of the same container within the window are
+    dropped, since the event holds the container with its current values.
+    All pending events are fired when the window ends, in the order the
+    containers were first changed. The windows are fired in order.
+
+    Parameters
+    ----------
+    center : Center instance
+        The Center instance.
+    window : float
+        The number of seconds to merge events. If zero, events are fired
+        directly.
+    """
+
+    def __init__(self, center, window):
+        """Set up instance."""
+        self._center = center
+        self._window = window
+        self._pending = {}
+        self._flush_lock = asyncio.Lock()
+        self._timer = None
+
+    async def add(self, key, event):
+        """Add a change event for the container with key."""
+        if not self._window:
+            await self._center.bus.notify(event)
+            return
+        if key in self._pending:
+            return
+        self._pending[key] = event
+        if self._timer is None:
+            self._timer = self._center.loop.call_later(
+                self._window, self._schedule_flush
+            )
+
+    def _schedule_flush(self):
+        """Schedule firing the pending events."""
+        self._timer = None
+        self._center.create_task(self.flush())
+
+    async def flush(self):
+        """Fire the pending events."""
+        async with self._flush_lock:
+            events, self._pending = self._pending, {}
+            if events:
+                _LOGGER.debug("Firing %s coalesced sample events", len(events))
+            for event in events.values():
+                await self._center.bus.notify(event)
+
+    async def stop(self):
+        """Fire the pending events and stop the window timer."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self.flush()
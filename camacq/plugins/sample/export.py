@@ -0,0 +1,147 @@
+"""Export sample state to files for offline analysis."""
+
+import csv
+import json
+import logging
+from functools import partial
+from itertools import islice
+
+_LOGGER = logging.getLogger(__name__)
+EXPORT_CHUNK_SIZE = 10000
+EXPORT_CSV = "csv"
+EXPORT_JSONL = "jsonl"
+# Start with the columns of sample_state.csv.
+CSV_COLUMNS = (
+    "plate_name",
+    "well_x",
+    "well_y",
+    "channel_name",
+    "gain",
+    "name",
+    "field_x",
+    "field_y",
+    "z_slice_id",
+    "channel_id",
+    "path",
+    "values",
+)
+# The values that have their own CSV column.
+CSV_VALUE_COLUMNS = ("channel_name", "gain")
+
+
+class SampleSnapshot:
+    """Represent the containers of a sample at one point in time.
+
+    The snapshot holds the containers of the sample when it was taken.
+    Before values are set on a container while the snapshot is in use,
+    the sample calls preserve to keep the old values in the snapshot.
+    The containers can then be iterated in another thread.
+
+    Parameters
+    ----------
+    items : list
+        A list of tuples of container key and container.
+    """
+
+    def __init__(self, items):
+        """Set up instance."""
+        self._items = items
+        self._preserved = {}
+
+    def __len__(self):
+        """Return the number of containers."""
+        return len(self._items)
+
+    def preserve(self, key, container):
+        """Keep the values of a container before they are changed."""
+        if key not in self._preserved:
+            self._preserved[key] = dict(container.values)
+
+    def iter_containers(self):
+        """Return an iterator of tuples of container key and values."""
+        for key, container in self._items:
+            # Read the current values before checking for preserved
+            # values, since the values may be changed in between.
+            values = dict(container.values)
+            yield key, self._preserved.get(key, values)
+
+
+async def export_snapshot(center, snapshot, path, export_format):
+    """Write a sample snapshot to a file in chunks in the executor.
+
+    Parameters
+    ----------
+    center : Center instance
+        The Center instance.
+    snapshot : SampleSnapshot instance
+        The snapshot to export.
+    path : str
+        The path of the file to write.
+    export_format : str
+        The file format, csv or jsonl.
+
+    Returns
+    -------
+    int
+        Return the number of exported containers.
+    """
+    export_file = await center.add_executor_job(
+        partial(open, path, "w", encoding="utf-8", newline="")
+    )
+    try:
+        write_row = await center.add_executor_job(
+            EXPORT_WRITERS[export_format], export_file
+        )
+        containers = snapshot.iter_containers()
+        exported = 0
+        while written := await center.add_executor_job(
+            write_chunk, write_row, containers, EXPORT_CHUNK_SIZE
+        ):
+            exported += written
+    finally:
+        await center.add_executor_job(export_file.close)
+    return exported
+
+
+def write_chunk(write_row, containers, size):
+    """Write at most size containers and return the number written."""
+    written = 0
+    for key, values in islice(containers, size):
+        write_row(key, values)
+        written += 1
+    return written
+
+
+def csv_writer(export_file):
+    """Write the CSV header and return a function to write a row."""
+    writer = csv.DictWriter(export_file, CSV_COLUMNS, restval="", extrasaction="ignore")
+    writer.writeheader()
+
+    def write_row(key, values):
+        """Write a container as a CSV row."""
+        row = {**dict(key.attrs), "name": key.name}
+        other_values = {}
+        for value_key, value in values.items():
+            if value_key in CSV_VALUE_COLUMNS:
+                row[value_key] = value
+            else:
+                other_values[value_key] = value
+        if other_values:
+            row["values"] = json.dumps(other_values, default=str)
+        writer.writerow(row)
+
+    return write_row
+
+
+def jsonl_writer(export_file):
+    """Return a function to write a JSON Lines row."""
+
+    def write_row(key, values):
+        """Write a container as a JSON line."""
+        export_file.write(json.dumps({**key.to_dict(), "values": values}, default=str))
+        export_file.write("\n")
+
+    return write_row
+
+
+EXPORT_WRITERS = {EXPORT_CSV: csv_writer, EXPORT_JSONL: jsonl_writer}
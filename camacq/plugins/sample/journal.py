@@ -0,0 +1,250 @@
+"""Persist sample state in an append-only journal with snapshots."""
+
+import asyncio
+import json
+import logging
+import os
+from contextlib import ExitStack
+from functools import partial
+from itertools import islice
+
+_LOGGER = logging.getLogger(__name__)
+RESTORE_CHUNK_SIZE = 1000
+SNAPSHOT_SUFFIX = ".snapshot"
+
+
+class SampleJournal:
+    """Write sample state changes to an append-only journal file.
+
+    Each change is written as one line of JSON with the sample name, a
+    dict of the container name and attributes and the values that were
+    set. The values are null for a removed image. When the journal has
+    grown by snapshot_interval changes, the full state of all samples is
+    written to a snapshot file and the journal is truncated. All file
+    access is done in the executor.
+
+    Parameters
+    ----------
+    center : Center instance
+        The Center instance.
+    path : str
+        The path to the journal file. The snapshot file has the same path
+        with a ``.snapshot`` suffix.
+    flush_interval : float
+        The number of seconds to buffer changes before writing them.
+    snapshot_interval : int
+        The number of written changes after which a snapshot is taken.
+    """
+
+    # The settings, the write buffer with its timer and lock and the
+    # restore state are all needed by the flush and restore paths.
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, center, path, flush_interval, snapshot_interval):
+        """Set up instance."""
+        self._center = center
+        self._path = path
+        self._flush_interval = flush_interval
+        self._snapshot_interval = snapshot_interval
+        self._buffer = []
+        self._changes = 0
+        self._file = None
+        self._flush_lock = asyncio.Lock()
+        self._timer = None
+        # Set when a running restore is done.
+        self._restored = None
+
+    @property
+    def restoring(self):
+        """:bool: Return True while the samples are restored."""
+        return self._restored is not None
+
+    @property
+    def _snapshot_path(self):
+        """:str: Return the path to the snapshot file."""
+        return f"{self._path}{SNAPSHOT_SUFFIX}"
+
+    async def wait_restored(self):
+        """Wait until a running restore is done."""
+        if self._restored is not None:
+            await self._restored.wait()
+
+    async def start(self):
+        """Open the journal file."""
+        self._file = await self._center.add_executor_job(
+            partial(open, self._path, "a", encoding="utf-8")
+        )
+        _LOGGER.info("Writing sample journal to %s", self._path)
+
+    def record(self, sample_name, key, values):
+        """Buffer a sample change to be written to the journal.
+
+        Parameters
+        ----------
+        sample_name : str
+            The name of the sample.
+        key : ContainerKey instance
+            The key of the changed container.
+        values : dict
+            The values that were set or None if the image was removed.
+        """
+        self._buffer.append(
+            json.dumps([sample_name, key.to_dict(), values], default=_encode_value)
+        )
+        if self._timer is None:
+            self._timer = self._center.loop.call_later(
+                self._flush_interval, self._schedule_flush
+            )
+
+    def _schedule_flush(self):
+        """Schedule writing the buffered changes."""
+        self._timer = None
+        self._center.create_task(self.flush())
+
+    async def flush(self):
+        """Write the buffered changes and take a snapshot if it's time."""
+        async with self._flush_lock:
+            await self._flush()
+            if self._changes >= self._snapshot_interval:
+                await self._snapshot()
+
+    async def snapshot(self):
+        """Write a snapshot of all samples and truncate the journal."""
+        async with self._flush_lock:
+            await self._flush()
+            await self._snapshot()
+
+    async def _flush(self):
+        """Write the buffered changes to the journal."""
+        if self._file is None:
+            # Keep the changes until the journal is started.
+            return
+        lines, self._buffer = self._buffer, []
+        if lines:
+            await self._center.add_executor_job(self._write, lines)
+            self._changes += len(lines)
+
+    def _write(self, lines):
+        """Write lines to the journal file."""
+        self._file.write("\n".join(lines) + "\n")
+        self._file.flush()
+
+    async def _snapshot(self):
+        """Write a snapshot of the state when the snapshot is started."""
+        # Changes made after the sample snapshots are taken are still in
+        # the buffer and will be written after the truncation.
+        with ExitStack() as stack:
+            snapshots = [
+                (sample.name, stack.enter_context(sample.snapshot()))
+                for sample in self._center.samples.values()
+            ]
+            written = await self._center.add_executor_job(
+                self._write_snapshot, snapshots
+            )
+        self._changes = 0
+        _LOGGER.debug("Wrote sample snapshot with %s containers", written)
+
+    def _write_snapshot(self, snapshots):
+        """Write the snapshot file and truncate the journal."""
+        tmp_path = f"{self._snapshot_path}.tmp"
+        written = 0
+        with open(tmp_path, "w", encoding="utf-8") as snapshot_file:
+            for sample_name, snapshot in snapshots:
+                for key, values in snapshot.iter_containers():
+                    record = [sample_name, key.to_dict(), values]
+                    snapshot_file.write(json.dumps(record, default=_encode_value))
+                    snapshot_file.write("\n")
+                    written += 1
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(tmp_path, self._snapshot_path)
+        if self._file is not None:
+            self._file.seek(0)
+            self._file.truncate()
+        return written
+
+    async def stop(self):
+        """Write the buffered changes and close the journal."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self.flush()
+        if self._file is not None:
+            await self._center.add_executor_job(self._file.close)
+            self._file = None
+
+    def load(self):
+        """Load the snapshot and the journal.
+
+        Invalid lines, eg an incomplete last line from a crash, are
+        skipped.
+
+        Returns
+        -------
+        dict
+            Return a dict with sample name as key and a list of tuples of
+            container attributes dict and values as value.
+        """
+        records = {}
+        for path in (self._snapshot_path, self._path):
+            try:
+                with open(path, encoding="utf-8") as journal_file:
+                    _load_lines(journal_file, records)
+            except FileNotFoundError:
+                continue
+        return records
+
+    async def restore(self):
+        """Restore all registered samples from the snapshot and journal.
+
+        The records are loaded in the executor and applied in chunks that
+        yield to the event loop in between. Sample changes wait until the
+        restore is done, so restored records don't overwrite them.
+
+        Returns
+        -------
+        int
+            Return the number of restored records.
+        """
+        self._restored = asyncio.Event()
+        try:
+            records = await self._center.add_executor_job(self.load)
+            restored = 0
+            for sample_name, sample_records in records.items():
+                sample = self._center.samples.get(sample_name)
+                if sample is None:
+                    _LOGGER.warning(
+                        "Skipping records of unknown sample %s", sample_name
+                    )
+                    continue
+                sample_records = iter(sample_records)
+                while chunk := list(islice(sample_records, RESTORE_CHUNK_SIZE)):
+                    sample.restore(chunk)
+                    restored += len(chunk)
+                    await asyncio.sleep(0)
+        finally:
+            self._restored.set()
+            self._restored = None
+        _LOGGER.info("Restored %s sample records from %s", restored, self._path)
+        return restored
+
+
+def _load_lines(journal_file, records):
+    """Add the records of the lines of an open file to records."""
+    for line in journal_file:
+        try:
+            sample_name, attrs, values = json.loads(line)
+            if isinstance(attrs, str):
+                # Records of older journals have a JSON id string.
+                attrs = json.loads(attrs)
+        except ValueError:
+            _LOGGER.warning("Skipping invalid sample record: %s", line)
+            continue
+        records.setdefault(sample_name, []).append((attrs, values))
+
+
+def _encode_value(value):
+    """Return a JSON serializable value for value."""
+    if isinstance(value, os.PathLike):
+        return os.fspath(value)
+    return f"<{type(value).__name__}>"
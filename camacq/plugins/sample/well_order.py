@@ -0,0 +1,163 @@
+"""Plan the order of the wells of a plate to shorten stage travel."""
+
+from functools import lru_cache
+
+import numpy as np
+
+ORDER_NEAREST = "nearest"
+ORDER_ROW = "row"
+ORDER_SERPENTINE = "serpentine"
+ORDER_TSP = "tsp"
+TSP_MAX_PASSES = 50
+
+
+def plan_wells(wells, order=ORDER_ROW):
+    """Return wells in the order to image them.
+
+    The distance between two wells is the euclidean distance between
+    the well coordinates. The first well is kept as the start well for
+    the nearest and tsp orders.
+
+    Parameters
+    ----------
+    wells : list
+        A list of tuples of well x and well y coordinates.
+    order : str
+        The well order. One of row, serpentine, nearest or tsp. Row
+        keeps the order of the wells. Serpentine reverses the y order
+        of every other well x. Nearest goes to the nearest well that is
+        not yet planned. Tsp improves the nearest order with 2-opt
+        moves, which is slower to plan.
+
+    Returns
+    -------
+    list
+        Return a list of tuples of well x and well y coordinates.
+    """
+    wells = [tuple(well) for well in wells]
+    if order not in ORDER_PLANNERS:
+        raise ValueError(f"Unknown well order: {order}")
+    if len(wells) < 3:
+        return wells
+    return ORDER_PLANNERS[order](wells)
+
+
+@lru_cache(maxsize=32)
+def well_order(x_wells, y_wells, order=ORDER_ROW):
+    """Return the wells of a plate format in the order to image them.
+
+    The order is planned once per plate format and order.
+
+    Parameters
+    ----------
+    x_wells : int
+        The number of wells in x.
+    y_wells : int
+        The number of wells in y.
+    order : str
+        The well order. One of row, serpentine, nearest or tsp.
+
+    Returns
+    -------
+    tuple
+        Return a tuple of tuples of well x and well y coordinates.
+    """
+    wells = [(well_x, well_y) for well_x in range(x_wells) for well_y in range(y_wells)]
+    return tuple(plan_wells(wells, order))
+
+
+@lru_cache(maxsize=32)
+def well_positions(x_wells, y_wells, order=ORDER_ROW):
+    """Return a dict of well coordinates to position in the well order."""
+    return {
+        well: position
+        for position, well in enumerate(well_order(x_wells, y_wells, order))
+    }
+
+
+def _row(wells):
+    """Return the wells in the given order."""
+    return wells
+
+
+def _serpentine(wells):
+    """Return the wells with every other well x in reversed y order."""
+    columns = {}
+    for well_x, well_y in sorted(wells):
+        columns.setdefault(well_x, []).append((well_x, well_y))
+    planned = []
+    for idx, column in enumerate(columns.values()):
+        planned.extend(reversed(column) if idx % 2 else column)
+    return planned
+
+
+def _nearest(wells):
+    """Return the wells in nearest neighbour order from the first well."""
+    return [wells[idx] for idx in _nearest_tour(np.array(wells, dtype=float))]
+
+
+def _nearest_tour(coords):
+    """Return the indices of coords in nearest neighbour order."""
+    visited = np.zeros(len(coords), dtype=bool)
+    current = 0
+    tour = [current]
+    visited[current] = True
+    for _ in range(len(coords) - 1):
+        distances = np.hypot(*(coords - coords[current]).T)
+        distances[visited] = np.inf
+        # Ties go to the first well in the given order.
+        current = int(np.argmin(distances))
+        visited[current] = True
+        tour.append(current)
+    return np.array(tour)
+
+
+def _tsp(wells):
+    """Return the nearest neighbour order improved with 2-opt moves."""
+    coords = np.array(wells, dtype=float)
+    tour = _nearest_tour(coords)
+    size = len(tour)
+    for _ in range(TSP_MAX_PASSES):
+        improved = False
+        for start in range(1, size - 1):
+            # Reverse the tour from start to an end if that shortens the
+            # open path. Pick the end with the largest gain.
+            path = coords[tour]
+            ends = np.arange(start + 1, size)
+            before = path[start - 1]
+            first = path[start]
+            removed = np.hypot(*(first - before)) + _path_step(path, ends)
+            added = np.hypot(*(path[ends] - before).T) + _path_step(
+                path, ends, origin=first
+            )
+            gain = removed - added
+            best = int(np.argmax(gain))
+            if gain[best] > 1e-9:
+                segment = slice(start, ends[best] + 1)
+                tour[segment] = tour[segment][::-1]
+                improved = True
+        if not improved:
+            break
+    return [wells[idx] for idx in tour]
+
+
+def _path_step(path, ends, origin=None):
+    """Return the distances from path[ends] or origin to the wells after ends.
+
+    The distance is zero for the last well of the open path.
+    """
+    size = len(path)
+    after = np.minimum(ends + 1, size - 1)
+    if origin is None:
+        origin = path[ends]
+    distances = np.hypot(*(path[after] - origin).T)
+    distances[ends + 1 >= size] = 0.0
+    return distances
+
+
+ORDER_PLANNERS = {
+    ORDER_NEAREST: _nearest,
+    ORDER_ROW: _row,
+    ORDER_SERPENTINE: _serpentine,
+    ORDER_TSP: _tsp,
+}
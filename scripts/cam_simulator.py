@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Simulate a Leica CAM server for load testing camacq.
+
+The simulator listens on the CAM socket, echoes every command and
+acknowledges the scan commands. When a cam scan is started it writes
+dummy images for the fields in the cam list into the imaging directory
+at a configurable number of images per second and sends a relpath reply
+per imaged field.
+
+Run it and then start camacq with the default config pointing the leica
+imaging_dir at the same directory::
+
+    python scripts/cam_simulator.py --imaging-dir /tmp/camsim --rate 100
+"""
+import asyncio
+import logging
+import time
+from functools import partial
+from pathlib import Path, PureWindowsPath
+
+import click
+import numpy as np
+import tifffile
+from leicacam.cam import bytes_as_dict, tuples_as_bytes
+
+_LOGGER = logging.getLogger("cam_simulator")
+
+# Map experiment job names to the job id and channel ids of the images.
+DEFAULT_JOBS = ("p10xgain=2:31", "p10xexp=4:0")
+IMAGE_NAME = (
+    "image--L0000--S00--U{well_x:02d}--V{well_y:02d}--J15--E{job_id:02d}--O01"
+    "--X{field_x:02d}--Y{field_y:02d}--T0000--Z00--C{channel_id:02d}.ome"
+)
+IMAGE_SHAPE = (16, 16)
+SCAN_FINISHED = [("inf", "scanfinished")]
+SCAN_STARTED = [("inf", "scanstart")]
+WELCOME_MSG = b"Welcome to the camacq CAM simulator"
+
+
+def parse_jobs(jobs):
+    """Return a dict of job name to job id and channel ids.
+
+    Parameters
+    ----------
+    jobs : sequence of str
+        Job mappings of the form ``name=job_id:channel_id,channel_id``.
+
+    Returns
+    -------
+    dict
+        Return a dict with job name as key and a tuple of job id and a
+        tuple of channel ids as value.
+    """
+    parsed = {}
+    for job in jobs:
+        name, _, ids = job.partition("=")
+        job_id, _, channel_ids = ids.partition(":")
+        parsed[name] = (
+            int(job_id),
+            tuple(int(channel_id) for channel_id in channel_ids.split(",")),
+        )
+    return parsed
+
+
+def write_image(path):
+    """Write a dummy image to path."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tifffile.imwrite(str(path), np.zeros(IMAGE_SHAPE, dtype=np.uint16))
+
+
+class CamSimulator:
+    """Represent a simulated CAM server.
+
+    Parameters
+    ----------
+    imaging_dir : str
+        Path to the directory where images are written.
+    rate : float
+        The number of images to write per second.
+    jobs : dict
+        Map job names to a tuple of job id and channel ids.
+    """
+
+    def __init__(self, imaging_dir, rate, jobs):
+        """Set up instance."""
+        self.imaging_dir = Path(imaging_dir)
+        self.rate = rate
+        self.jobs = jobs
+        # Map (exp, wellx, welly, fieldx, fieldy) to field enabled state.
+        self.camlist = {}
+        self.scan_count = 0
+        self.images = 0
+        self._scan_task = None
+
+    async def handle_client(self, reader, writer):
+        """Handle a connected client."""
+        _LOGGER.info("Client connected")
+        writer.write(WELCOME_MSG)
+        await writer.drain()
+        try:
+            while True:
+                data = await reader.read(1024)
+                if not data:
+                    break
+                for line in data.split(b"\x00"):
+                    for msg in line.splitlines():
+                        if msg.strip():
+                            await self.handle_command(writer, msg.strip())
+        except ConnectionError:
+            pass
+        finally:
+            self._cancel_scan()
+            writer.close()
+            _LOGGER.info("Client disconnected")
+
+    async def handle_command(self, writer, msg):
+        """Handle a command message and send replies."""
+        command = bytes_as_dict(msg)
+        cmd = command.get("cmd")
+        _LOGGER.debug("Received: %s", msg)
+        await send(writer, list(command.items()))
+        if cmd == "startscan":
+            await send(writer, SCAN_STARTED)
+        elif cmd == "stopscan":
+            self._cancel_scan()
+            await send(writer, SCAN_FINISHED)
+        elif cmd == "deletelist":
+            self.camlist.clear()
+        elif cmd == "add" and command.get("tar") == "camlist":
+            self.camlist[_field_key(command)] = True
+        elif cmd == "enable":
+            for key in self.camlist:
+                if key[1:] == _field_key(command)[1:]:
+                    self.camlist[key] = command.get("value") == "true"
+        elif cmd == "enableall":
+            for key in self.camlist:
+                self.camlist[key] = command.get("value") == "true"
+        elif cmd == "startcamscan":
+            self._cancel_scan()
+            fields = [key for key, enabled in self.camlist.items() if enabled]
+            self.scan_count += 1
+            self._scan_task = asyncio.create_task(
+                self.scan(writer, fields, self.scan_count)
+            )
+        elif cmd == "stopcamscan":
+            self._cancel_scan()
+
+    def _cancel_scan(self):
+        """Cancel a running cam scan."""
+        if self._scan_task is not None:
+            self._scan_task.cancel()
+            self._scan_task = None
+
+    async def _write_image(self, rel_path):
+        """Write the image of a relative path in the executor."""
+        path = self.imaging_dir.joinpath(*rel_path.parts)
+        await asyncio.get_running_loop().run_in_executor(
+            None, partial(write_image, path.with_name(f"{path.name}.tif"))
+        )
+        self.images += 1
+
+    async def scan(self, writer, fields, scan_number):
+        """Image the fields and send a relpath reply per field."""
+        rel_dir = PureWindowsPath("subfolder", "exp1", f"CAM{scan_number}")
+        start = time.monotonic()
+        scan_images = 0
+        _LOGGER.info("Starting cam scan %s of %s fields", scan_number, len(fields))
+        for field in fields:
+            if field[0] not in self.jobs:
+                _LOGGER.warning("Unknown job %s, skipping field", field[0])
+                continue
+            job_id, channel_ids = self.jobs[field[0]]
+            for channel_id in channel_ids:
+                rel_path = _image_rel_path(rel_dir, field, job_id, channel_id)
+                await self._write_image(rel_path)
+                scan_images += 1
+                delay = start + scan_images / self.rate - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await send(writer, [("relpath", str(rel_path))])
+        elapsed = time.monotonic() - start
+        _LOGGER.info(
+            "Finished cam scan %s in %.3f seconds (%.1f images/s)",
+            scan_number,
+            elapsed,
+            scan_images / elapsed if elapsed else 0.0,
+        )
+
+
+def _image_rel_path(rel_dir, field, job_id, channel_id):
+    """Return the relative path of an image without file extension."""
+    _, well_x, well_y, field_x, field_y = field
+    field_dir = rel_dir.joinpath(
+        "slide--S00",
+        f"chamber--U{well_x:02d}--V{well_y:02d}",
+        f"field--X{field_x:02d}--Y{field_y:02d}",
+    )
+    return field_dir / IMAGE_NAME.format(
+        well_x=well_x,
+        well_y=well_y,
+        job_id=job_id,
+        field_x=field_x,
+        field_y=field_y,
+        channel_id=channel_id,
+    )
+
+
+def _field_key(command):
+    """Return the 0-based camlist key of a command."""
+    return (
+        command.get("exp"),
+        int(command.get("wellx", 1)) - 1,
+        int(command.get("welly", 1)) - 1,
+        int(command.get("fieldx", 1)) - 1,
+        int(command.get("fieldy", 1)) - 1,
+    )
+
+
+async def send(writer, reply):
+    """Send a reply to the client."""
+    writer.write(tuples_as_bytes(reply) + b"\n")
+    await writer.drain()
+
+
+async def serve(host, port, simulator):
+    """Serve the simulator until cancelled."""
+    server = await asyncio.start_server(simulator.handle_client, host, port)
+    _LOGGER.info("Serving CAM simulator on %s:%s", host, port)
+    async with server:
+        await server.serve_forever()
+
+
+@click.command()
+@click.option("--host", default="localhost", help="Host to listen on.")
+@click.option("--port", default=8895, help="Port to listen on.")
+@click.option(
+    "--imaging-dir",
+    type=click.Path(file_okay=False, writable=True),
+    required=True,
+    help="Directory where images are written.",
+)
+@click.option("--rate", default=10.0, help="Number of images written per second.")
+@click.option(
+    "--job",
+    "jobs",
+    multiple=True,
+    default=DEFAULT_JOBS,
+    show_default=True,
+    help="Map a job name to job id and channel ids, eg p10xexp=4:0,1.",
+)
+@click.option("--debug", is_flag=True, help="Log all received commands.")
+def main(host, port, imaging_dir, rate, jobs, debug):
+    """Run a simulated Leica CAM server."""
+    # pylint: disable=too-many-arguments
+    logging.basicConfig(level=logging.DEBUG if debug else logging.INFO)
+    simulator = CamSimulator(imaging_dir, rate, parse_jobs(jobs))
+    try:
+        asyncio.run(serve(host, port, simulator))
+    except KeyboardInterrupt:
+        _LOGGER.info(
+            "Wrote %s images in %s scans", simulator.images, simulator.scan_count
+        )
+
+
+if __name__ == "__main__":
+    main()  # pylint:disable=no-value-for-parameter
@@ -63,7 +63,9 @@ CONFIG = {
         "camacq.plugins": [
             "api = camacq.plugins.api",
             "automations = camacq.plugins.automations",
+            "diagnostics = camacq.plugins.diagnostics",
             "leica = camacq.plugins.leica",
+            "recorder = camacq.plugins.recorder",
             "rename_image = camacq.plugins.rename_image",
             "sample = camacq.plugins.sample",
         ],
@@ -91,6 +91,16 @@ class MockApi(api_mod.Api):
         """Send a command to the microscope to stop the imaging."""
         self.calls.append((self.stop_imaging.__name__,))
 
+    async def sync_camlist(self, fields, **kwargs):
+        """Change the cam list of the microscope to the given fields.
+
+        Parameters
+        ----------
+        fields : list
+            A list of dicts with the cam list fields.
+        """
+        self.calls.append((self.sync_camlist.__name__, fields))
+
 
 class MockSample(sample_mod.Sample):
     """Represent a mock sample."""
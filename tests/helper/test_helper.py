@@ -85,3 +85,30 @@ async def test_many_module_matches(center):
     """Test many module matches."""
     with pytest.raises(ValueError):
         helper.get_module("camacq.plugins", "")
+
+
+@pytest.mark.parametrize(
+    "value, message",
+    [
+        ("test", "expected a dictionary"),
+        ({}, "required key not provided @ data['name']"),
+        ({"name": "c"}, "not a valid value for dictionary value @ data['name']"),
+        ({"name": ["a"]}, "not a valid value for dictionary value @ data['name']"),
+        ({"name": "b", "b": "x"}, "expected int for dictionary value @ data['b']"),
+    ],
+)
+def test_select_schema_invalid(value, message):
+    """Test select schema with invalid values."""
+    schema = vol.Schema(
+        helper.select_schema(
+            "name",
+            {
+                "a": {vol.Required("name"): "a", "a": vol.Coerce(str)},
+                "b": {vol.Required("name"): "b", "b": int},
+            },
+        )
+    )
+    assert schema({"name": "a", "a": 1}) == {"name": "a", "a": "1"}
+    with pytest.raises(vol.Invalid) as exc_info:
+        schema(value)
+    assert str(exc_info.value) == message
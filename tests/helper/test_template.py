@@ -53,3 +53,32 @@ async def test_next_well_no_plate(center, sample):
     render = render_template(tmpl, variables)
     assert render["data"]["next_well_x"] == "None"
     assert render["data"]["next_well_y"] == "None"
+
+
+async def test_well_order(center, sample):
+    """Test well order template functions."""
+    data = """
+        data:
+          next_well_y: >
+            {{next_well_y(samples.test, 'test_plate', 2, 2, 'serpentine')}}
+          well_order: >
+            {{well_order(2, 2, 'serpentine')}}
+    """
+
+    data = YAML(typ="safe").load(data)
+    tmpl = make_template(center, data)
+    variables = {"samples": center.samples}
+    await center.samples.test.set_sample("plate", plate_name="test_plate")
+    for well_y in range(2):
+        await center.samples.test.set_sample(
+            "well",
+            plate_name="test_plate",
+            well_x=0,
+            well_y=well_y,
+            values={"well_img_ok": True},
+        )
+
+    render = render_template(tmpl, variables)
+
+    assert render["data"]["next_well_y"] == "1"
+    assert render["data"]["well_order"] == "[(0, 0), (0, 1), (1, 1), (1, 0)]"
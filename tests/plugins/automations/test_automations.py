@@ -1,13 +1,17 @@
 """Test automations."""
 
+import asyncio
 import logging
+from collections import deque
 from unittest.mock import call
 
 from ruamel.yaml import YAML
 
 from camacq import plugins
+from camacq.const import CAMACQ_STOP_EVENT
 from camacq.control import CamAcqStartEvent
 from camacq.plugins import api as api_mod
+from camacq.plugins.automations import ActionSequence
 
 
 async def test_setup_automation(center, sample):
@@ -292,3 +296,82 @@ async def test_delay_action(center, api, caplog):
     assert api.calls[-2] == ("start_imaging",)
     assert api.calls[-1] == ("stop_imaging",)
     assert "Action delay for 0.0 seconds" in caplog.text
+
+
+async def test_delay_handler_count(center):
+    """Test that fired delays don't leave stop handlers on the bus."""
+    # pylint: disable=protected-access
+    registry = center.bus._registry
+    handler_count = len(registry.get(CAMACQ_STOP_EVENT, {}))
+    sequence = ActionSequence(center, [])
+
+    for _ in range(300):
+        sequence.delay(0.0, {}, deque())
+
+    assert len(registry[CAMACQ_STOP_EVENT]) == handler_count + 300
+
+    await asyncio.sleep(0.01)
+    await center.wait_for()
+
+    assert len(registry[CAMACQ_STOP_EVENT]) == handler_count
+
+
+async def test_event_trigger_index(center, api):
+    """Test that triggers are matched on event data via the index."""
+    config = """
+        automations:
+          - name: test_one
+            trigger:
+              - type: event
+                id: command_event
+                data:
+                  data:
+                    test: 1
+            action:
+              - type: command
+                id: send
+                data:
+                  command: one
+          - name: test_two
+            trigger:
+              - type: event
+                id: command_event
+                data:
+                  command:
+            action:
+              - type: command
+                id: send
+                data:
+                  command: two
+          - name: test_any
+            trigger:
+              - type: event
+                id: command_event
+            action:
+              - type: command
+                id: send
+                data:
+                  command: any
+    """
+
+    config = YAML(typ="safe").load(config)
+    await plugins.setup_module(center, config)
+    handlers = center.bus._registry["command_event"]  # pylint: disable=protected-access
+    assert len(handlers) == 1
+
+    await center.bus.notify(api_mod.CommandEvent(data={"test": 1}))
+    await center.wait_for()
+
+    assert api.calls == [("send", "one"), ("send", "two"), ("send", "any")]
+
+    await center.actions.call("automations", "toggle", name="test_two")
+    api.calls.clear()
+    await center.bus.notify(api_mod.CommandEvent(data={"test": 2}))
+    await center.wait_for()
+
+    assert api.calls == [("send", "any")]
+
+    for name in ("test_one", "test_any"):
+        await center.actions.call("automations", "toggle", name=name)
+
+    assert not handlers
@@ -0,0 +1,99 @@
+"""Test the cam list manager."""
+
+from camacq.plugins.leica.camlist import CamList, CamListField
+from camacq.plugins.leica.command import cam_com, del_com, enable_com
+
+
+def make_fields(well_x, well_y, exp="p10xexp"):
+    """Return the cam list fields of 2 x 3 fields in a well."""
+    return [
+        CamListField(exp, well_x, well_y, field_x, field_y, 0, 0)
+        for field_x in range(2)
+        for field_y in range(3)
+    ]
+
+
+def sync(camlist, fields):
+    """Plan and apply a sync and return the commands."""
+    plan = camlist.plan(fields)
+    camlist.apply(plan)
+    return plan.commands
+
+
+def test_unknown_list():
+    """Test that an unknown list is deleted and added again."""
+    camlist = CamList()
+    fields = make_fields(0, 0)
+
+    commands = sync(camlist, fields)
+
+    assert commands == [del_com(), *(cam_com(*field) for field in fields)]
+    assert camlist.stats == {"syncs": 1, "sent": 7, "saved": 0}
+    assert sync(camlist, fields) == []
+    assert camlist.stats == {"syncs": 2, "sent": 7, "saved": 7}
+
+
+def test_add_fields():
+    """Test that only missing fields are added."""
+    camlist = CamList()
+    fields = make_fields(0, 0)
+    sync(camlist, fields[:4])
+
+    commands = sync(camlist, fields)
+
+    assert commands == [cam_com(*field) for field in fields[4:]]
+
+
+def test_disable_and_enable_fields():
+    """Test that unwanted fields are disabled and enabled when wanted again."""
+    camlist = CamList()
+    fields = make_fields(0, 0)
+    sync(camlist, fields)
+
+    commands = sync(camlist, fields[:5])
+
+    assert commands == [enable_com(0, 0, 1, 2, False)]
+
+    commands = sync(camlist, fields)
+
+    assert commands == [enable_com(0, 0, 1, 2, True)]
+
+
+def test_rebuild_when_cheaper():
+    """Test that the list is deleted when that needs fewer commands."""
+    camlist = CamList()
+    sync(camlist, make_fields(0, 0))
+    fields = make_fields(0, 1)
+
+    commands = sync(camlist, fields)
+
+    assert commands == [del_com(), *(cam_com(*field) for field in fields)]
+
+
+def test_rebuild_changed_field():
+    """Test that the list is deleted when a matrix field changes job."""
+    camlist = CamList()
+    fields = make_fields(0, 0)
+    sync(camlist, fields)
+    changed = [*fields[:5], fields[5]._replace(exp="p10xgain")]
+
+    commands = sync(camlist, changed)
+
+    assert commands == [del_com(), *(cam_com(*field) for field in changed)]
+
+
+def test_track():
+    """Test that commands sent outside of a sync update the state."""
+    camlist = CamList()
+    fields = make_fields(0, 0)
+    camlist.track(del_com())
+
+    assert sync(camlist, fields[:1]) == [cam_com(*fields[0])]
+
+    camlist.track(cam_com(*fields[1]))
+
+    assert sync(camlist, fields[:1])[0] == del_com()
+
+    camlist.track(enable_com(0, 0, 0, 0, False))
+
+    assert sync(camlist, fields[:1]) == [enable_com(0, 0, 0, 0, True)]
@@ -0,0 +1,36 @@
+"""Test the leica duplicate reply window."""
+
+from camacq.plugins.leica.dedupe import DedupeWindow
+
+
+def test_dedupe_window():
+    """Test that keys are remembered within the time and size limits."""
+    now = [0.0]
+    window = DedupeWindow(2, 10.0, clock=lambda: now[0])
+
+    assert not window.seen("a")
+    assert not window.seen("b")
+    assert window.seen("a")
+
+    # Interleaved keys are still duplicates.
+    assert not window.seen("c")
+
+    # The oldest key "b" was evicted to stay within the size limit.
+    assert window.seen("a")
+    assert not window.seen("b")
+    assert len(window) == 2
+
+    now[0] = 10.0
+
+    assert not window.seen("a")
+    assert window.stats == {
+        "size": 1,
+        "hits": 2,
+        "misses": 5,
+        "evicted": 2,
+        "expired": 2,
+    }
+
+    window.clear()
+
+    assert len(window) == 0
@@ -2,7 +2,16 @@
 
 from pathlib import PureWindowsPath
 
-from camacq.plugins.leica.helper import find_image_path, get_field, get_imgs, get_well
+from leicaimage import attribute, attribute_as_str
+
+from camacq.plugins.leica import LeicaImageEvent
+from camacq.plugins.leica.helper import (
+    find_image_path,
+    get_field,
+    get_imgs,
+    get_well,
+    parse_image_path,
+)
 
 from tests.common import FIELD_PATH, IMAGE_PATH, WELL_PATH
 
@@ -43,3 +52,29 @@ def test_get_imgs():
     images = get_imgs(str(FIELD_PATH), search="C22")
 
     assert len(images) == 3
+
+
+def test_parse_image_path():
+    """Test parse image path."""
+    path = str(IMAGE_PATH)
+    parse_image_path.cache_clear()
+
+    attrs = parse_image_path(path)
+
+    assert attrs.plate_name == attribute_as_str(path, "S")
+    for attr, name in (
+        ("well_x", "U"),
+        ("well_y", "V"),
+        ("field_x", "X"),
+        ("field_y", "Y"),
+        ("z_slice_id", "Z"),
+        ("channel_id", "C"),
+        ("job_id", "E"),
+    ):
+        assert getattr(attrs, attr) == attribute(path, name)
+    assert parse_image_path("image.tif").well_x is None
+
+    event = LeicaImageEvent({"path": IMAGE_PATH})
+
+    assert event.channel_id == attrs.channel_id
+    assert parse_image_path.cache_info().hits == 1
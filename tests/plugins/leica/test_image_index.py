@@ -0,0 +1,38 @@
+"""Test the leica image index."""
+
+from camacq.plugins.leica.image_index import ImageIndex
+
+
+def make_image(field_path, job_id, channel_id):
+    """Create an image file in a field directory and return the name."""
+    name = f"image--U00--V00--E{job_id:02d}--X00--Y00--C{channel_id:02d}.ome.tif"
+    (field_path / name).touch()
+    return name
+
+
+def test_new_images(tmp_path):
+    """Test that each image is returned once."""
+    field_path = tmp_path / "field--X00--Y00"
+    field_path.mkdir()
+    index = ImageIndex()
+    names = [make_image(field_path, 1, channel_id) for channel_id in range(2)]
+    job_2_name = make_image(field_path, 2, 0)
+    (field_path / "metadata.xml").touch()
+
+    images = index.new_images(str(field_path), search="--E01")
+
+    assert images == [field_path / name for name in names]
+    assert not index.new_images(str(field_path), search="--E01")
+
+    names.append(make_image(field_path, 1, 2))
+
+    assert index.new_images(str(field_path), search="--E01") == [field_path / names[2]]
+    assert index.new_images(str(field_path), search="--E02") == [
+        field_path / job_2_name
+    ]
+    assert not index.new_images(str(field_path))
+    assert not index.new_images(str(tmp_path / "missing"))
+
+    index.clear()
+
+    assert len(index.new_images(str(field_path))) == 4
@@ -0,0 +1,85 @@
+"""Test the ingest queue."""
+
+import asyncio
+
+from camacq.plugins.leica.ingest import IngestQueue
+
+
+async def test_ordered_workers(center):
+    """Test that items with the same key are handled in order."""
+    handled = []
+
+    async def handler(item):
+        """Handle an item."""
+        key, _ = item
+        # Let the first key wait longer to interleave the workers.
+        await asyncio.sleep(0.01 if key == "a" else 0)
+        handled.append(item)
+
+    queue = IngestQueue(center, handler, 10, 2, key_func=lambda item: item[0])
+    for number in range(3):
+        await queue.put(("a", number))
+        await queue.put(("b", number))
+    await center.wait_for()
+
+    assert [item for item in handled if item[0] == "a"] == [("a", n) for n in range(3)]
+    assert [item for item in handled if item[0] == "b"] == [("b", n) for n in range(3)]
+    assert queue.stats == {
+        "depth": 0,
+        "high_water": 6,
+        "received": 6,
+        "processed": 6,
+        "late": 0,
+        "dropped": 0,
+    }
+
+
+async def test_backpressure_and_stop(center):
+    """Test that put waits when the queue is full and stop drops items."""
+    release = asyncio.Event()
+    handled = []
+
+    async def handler(item):
+        """Handle an item when released."""
+        await release.wait()
+        handled.append(item)
+
+    queue = IngestQueue(center, handler, 1, 1)
+    await queue.put(1)
+    await asyncio.sleep(0)  # let the worker take the first item
+    await queue.put(2)
+    put_task = asyncio.create_task(queue.put(3))
+    await asyncio.sleep(0)
+
+    assert not put_task.done()
+    assert queue.depth == 1
+
+    await queue.stop()
+    await put_task
+
+    assert not handled
+    assert queue.dropped == 3
+    assert queue.processed == 0
+
+    await queue.put(4)
+
+    assert queue.dropped == 4
+    assert queue.depth == 0
+    assert not handled
+
+
+async def test_join(center):
+    """Test that join waits until all queued items are handled."""
+    handled = []
+
+    async def handler(item):
+        """Handle an item."""
+        await asyncio.sleep(0)
+        handled.append(item)
+
+    queue = IngestQueue(center, handler, 10, 2, key_func=lambda item: item)
+    for number in range(4):
+        await queue.put(number)
+    await queue.join()
+
+    assert sorted(handled) == list(range(4))
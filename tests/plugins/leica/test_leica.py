@@ -1,6 +1,7 @@
 """Test Leica API."""
 
 import asyncio
+import json
 from collections import OrderedDict
 from pathlib import Path
 from unittest.mock import AsyncMock, Mock, patch
@@ -12,6 +13,7 @@ from camacq import plugins
 from camacq.plugins import api as base_api
 from camacq.plugins.leica import (
     LEICA_COMMAND_EVENT,
+    LEICA_IMAGE_EVENT,
     LEICA_START_COMMAND_EVENT,
     LEICA_STOP_COMMAND_EVENT,
     LeicaApi,
@@ -19,6 +21,7 @@ from camacq.plugins.leica import (
     LeicaImageEvent,
     LeicaStartCommandEvent,
     LeicaStopCommandEvent,
+    command,
 )
 
 # pylint: disable=redefined-outer-name
@@ -45,10 +48,10 @@ async def api(center):
 
 
 @pytest.fixture
-def get_imgs():
-    """Mock leica helper get_imgs."""
-    with patch("camacq.plugins.leica.get_imgs") as mock_get_imgs:
-        yield mock_get_imgs
+def new_images():
+    """Mock leica image index new_images."""
+    with patch("camacq.plugins.leica.ImageIndex.new_images") as mock_new_images:
+        yield mock_new_images
 
 
 async def test_setup_bad_socket(center, caplog):
@@ -86,6 +89,99 @@ async def test_send(api):
     assert event.command == cmd_string
 
 
+async def test_send_handler_count(api):
+    """Test that sent commands don't leave handlers on the bus."""
+    cmd_tuples = [("cmd", "deletelist")]
+    # pylint: disable=protected-access
+    registry = api.center.bus._registry
+
+    async def mock_send(commands):
+        """Mock client send."""
+        await api.receive([OrderedDict(cmd_tuples)])
+
+    api.client.send.side_effect = mock_send
+    await api.send(cmd_tuples)
+    handler_count = len(registry.get(LEICA_COMMAND_EVENT, []))
+
+    for _ in range(1000):
+        await api.send(cmd_tuples)
+
+    assert len(registry.get(LEICA_COMMAND_EVENT, [])) == handler_count
+    assert not api._pending
+
+
+async def test_send_cancel(api):
+    """Test that a cancelled command doesn't take the reply of the next."""
+    cmd_tuples = [("cmd", "deletelist")]
+    # pylint: disable=protected-access
+    cancelled = await api.send(cmd_tuples, block=False)
+    cmd_sent = await api.send(cmd_tuples, block=False)
+    cancelled.cancel()
+
+    await api.receive([OrderedDict(cmd_tuples)])
+
+    assert cmd_sent.done()
+    await asyncio.sleep(0)
+    assert not api._pending
+
+
+async def test_send_many_window(api):
+    """Test that send many keeps a window of commands waiting for replies."""
+    api.config["send_window"] = 3
+    commands = [
+        [("cmd", "enable"), ("slide", "0"), ("field", str(idx))] for idx in range(10)
+    ]
+    sent = []
+    max_in_flight = 0
+
+    async def mock_send(commands):
+        """Mock client send and reply later."""
+        nonlocal max_in_flight
+        sent.append(commands)
+        # pylint: disable=protected-access
+        max_in_flight = max(max_in_flight, len(api._pending.get(("cmd", "enable"), ())))
+        api.center.loop.call_soon(
+            api.center.create_task, api.receive([OrderedDict(commands)])
+        )
+
+    api.client.send.side_effect = mock_send
+
+    await api.send_many(commands)
+
+    assert sent == commands
+    assert max_in_flight == 3
+    assert not api._pending  # pylint: disable=protected-access
+
+
+async def test_sync_camlist_action(center, api):
+    """Test the sync camlist action."""
+    fields = [
+        {"exp": "p10xexp", "well_x": 0, "well_y": 0, "field_x": 0, "field_y": idx}
+        for idx in range(2)
+    ]
+    add_commands = [command.cam_com("p10xexp", 0, 0, 0, idx, 0, 0) for idx in range(2)]
+
+    async def mock_send(commands):
+        """Mock client send."""
+        await api.receive([OrderedDict(commands)])
+
+    api.client.send.side_effect = mock_send
+    base_api.register_api(center, api)
+
+    await center.actions.command.sync_camlist(fields=fields)
+    await center.wait_for()
+
+    sent = [args[0] for _, args, _ in api.client.send.mock_calls]
+    assert sent == [command.del_com(), *add_commands]
+
+    await center.actions.command.sync_camlist(fields=json.dumps(fields[:1]))
+    await center.wait_for()
+
+    _, args, _ = api.client.send.mock_calls[-1]
+    assert args[0] == command.enable_com(0, 0, 0, 1, False)
+    assert api.camlist_stats == {"syncs": 2, "sent": 4, "saved": 1}
+
+
 async def test_start_imaging(api):
     """Test the leica api start imaging method."""
     event_string = "/inf:scanstart"
@@ -136,7 +232,7 @@ async def test_stop_imaging(api):
     assert event.command == event_string
 
 
-async def test_receive(api, get_imgs):
+async def test_receive(api, new_images):
     """Test the leica api receive method."""
     image_path = (
         "subfolder/exp1/CAM1/slide--S00/chamber--U00--V00/"
@@ -156,14 +252,14 @@ async def test_receive(api, get_imgs):
     leica_config = {"imaging_dir": root_path}
     api.config = leica_config
     image_path = str(Path(root_path) / image_path)
-    get_imgs.return_value = [image_path]
+    new_images.return_value = [image_path]
     mock_handler = AsyncMock()
     api.center.bus.register("image_event", mock_handler)
 
     await api.receive([OrderedDict(cmd_tuples)])
 
-    assert get_imgs.call_count == 1
-    _, args, kwargs = get_imgs.mock_calls[0]
+    assert new_images.call_count == 1
+    _, args, kwargs = new_images.mock_calls[0]
     assert args[0] == str(Path(root_path) / field_path)
     assert kwargs == {"search": "--E04"}
     assert mock_handler.call_count == 1
@@ -176,6 +272,29 @@ async def test_receive(api, get_imgs):
     assert event.plate_name == "00"
 
 
+async def test_receive_duplicates(api, new_images):
+    """Test that interleaved duplicate image replies are skipped."""
+    rel_path = (
+        "slide--S00/chamber--U00--V00/field--X01--Y01/"
+        "image--L0000--S00--U00--V00--J15--E0{}--O01--X01--Y01--T0000--Z00--C00.ome.tif"
+    )
+    new_images.return_value = []
+    replies = [
+        OrderedDict([("relpath", rel_path.format(job_id))]) for job_id in (1, 2, 1)
+    ]
+
+    await api.receive(replies)
+
+    assert new_images.call_count == 2
+    assert api.dedupe_stats["hits"] == 1
+    assert api.dedupe_stats["misses"] == 2
+
+    await api.receive([OrderedDict([("inf", "scanstart")])])
+    await api.receive(replies[:1])
+
+    assert new_images.call_count == 3
+
+
 async def test_start_listen(center, caplog):
     """Test start listen for incoming messages."""
     config = {"leica": {}}
@@ -201,3 +320,89 @@ async def test_start_listen(center, caplog):
 
     mock_cam.receive.assert_awaited()
     assert mock_handler.call_count == 1
+
+
+async def test_start_listen_image(center, new_images):
+    """Test that image replies are handled via the ingest queue."""
+    config = {"leica": {}}
+    rel_path = (
+        "subfolder/exp1/CAM1/slide--S00/chamber--U00--V00/field--X01--Y01"
+        "/image--L0000--S00--U00--V00--J15--E04--O01"
+        "--X01--Y01--T0000--Z00--C00.ome.tif"
+    )
+    commands = [OrderedDict([("relpath", rel_path)])]
+    new_images.return_value = [rel_path]
+
+    async def mock_receive():
+        """Mock receive."""
+        await asyncio.sleep(0)
+        if commands:
+            return [commands.pop()]
+        raise asyncio.CancelledError
+
+    mock_handler = AsyncMock()
+    center.bus.register(LEICA_IMAGE_EVENT, mock_handler)
+
+    with patch("camacq.plugins.leica.AsyncCAM", autospec=True) as mock_cam_class:
+        mock_cam = mock_cam_class.return_value
+        mock_cam.receive.side_effect = mock_receive
+        await plugins.setup_module(center, config)
+        await center.wait_for()
+        api = center.data["api"]["camacq.plugins.leica"]
+        await center.end(0)
+
+    assert mock_handler.call_count == 1
+    assert api.ingest_stats["received"] == 1
+    assert api.ingest_stats["processed"] == 1
+    assert api.ingest_stats["dropped"] == 0
+
+
+async def test_start_listen_scan_order(center, new_images):
+    """Test that scan replies are handled after preceding image replies."""
+    config = {"leica": {}}
+    rel_path = (
+        "subfolder/exp1/CAM1/slide--S00/chamber--U00--V00/field--X01--Y01"
+        "/image--L0000--S00--U00--V00--J15--E04--O01"
+        "--X01--Y01--T0000--Z00--C00.ome.tif"
+    )
+    replies = [
+        [
+            OrderedDict([("relpath", rel_path)]),
+            OrderedDict([("inf", "scanfinished")]),
+            OrderedDict([("cmd", "deletelist")]),
+        ]
+    ]
+    new_images.return_value = [rel_path]
+    handled = []
+
+    async def mock_receive():
+        """Mock receive."""
+        await asyncio.sleep(0)
+        if replies:
+            return replies.pop()
+        raise asyncio.CancelledError
+
+    async def handle_image(center, event):
+        """Handle image event slowly."""
+        await asyncio.sleep(0.01)
+        handled.append(LEICA_IMAGE_EVENT)
+
+    async def handle_event(center, event):
+        """Handle event."""
+        handled.append(event.event_type)
+
+    center.bus.register(LEICA_IMAGE_EVENT, handle_image)
+    center.bus.register(LEICA_COMMAND_EVENT, handle_event)
+
+    with patch("camacq.plugins.leica.AsyncCAM", autospec=True) as mock_cam_class:
+        mock_cam = mock_cam_class.return_value
+        mock_cam.receive.side_effect = mock_receive
+        await plugins.setup_module(center, config)
+        await center.wait_for()
+        await center.end(0)
+
+    assert handled == [
+        LEICA_COMMAND_EVENT,
+        LEICA_IMAGE_EVENT,
+        LEICA_STOP_COMMAND_EVENT,
+    ]
@@ -0,0 +1,296 @@
+"""Test the Leica sample."""
+
+import pytest
+
+from camacq import plugins
+from camacq.plugins.leica.sample import LeicaSample, next_well_xy
+from camacq.plugins.sample import SAMPLE_EVENT, get_matched_samples, register_sample
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def leica_sample(center):
+    """Return a registered leica sample."""
+    sample = LeicaSample()
+    register_sample(center, sample)
+    return sample
+
+
+async def set_image(sample, well_x, field_x, channel_id):
+    """Set an image on the sample and return the path."""
+    path = f"U{well_x:02d}--X{field_x:02d}--C{channel_id:02d}.ome.tif"
+    await sample.set_sample(
+        "image",
+        path=path,
+        plate_name="00",
+        well_x=well_x,
+        well_y=0,
+        field_x=field_x,
+        field_y=0,
+        z_slice_id=0,
+        channel_id=channel_id,
+    )
+    return path
+
+
+async def test_container_images(leica_sample):
+    """Test that containers index their own images."""
+    paths = [
+        await set_image(leica_sample, well_x, field_x, channel_id)
+        for well_x in range(2)
+        for field_x in range(2)
+        for channel_id in range(2)
+    ]
+
+    plate = leica_sample.get_sample("plate", plate_name="00")
+    well = leica_sample.get_sample("well", plate_name="00", well_x=1, well_y=0)
+    field = leica_sample.get_sample(
+        "field", plate_name="00", well_x=1, well_y=0, field_x=0, field_y=0
+    )
+    channel = leica_sample.get_sample(
+        "channel", plate_name="00", well_x=1, well_y=0, channel_id=1
+    )
+    z_slice = leica_sample.get_sample(
+        "z_slice", plate_name="00", well_x=0, well_y=0, z_slice_id=0
+    )
+
+    assert list(plate.images) == paths
+    assert list(well.images) == paths[4:]
+    assert list(field.images) == paths[4:6]
+    assert list(channel.images) == [paths[5], paths[7]]
+    assert list(z_slice.images) == paths[:4]
+
+    image = leica_sample.remove_image(paths[5])
+
+    assert image.path == paths[5]
+    assert paths[5] not in leica_sample.images
+    assert list(plate.images) == paths[:5] + paths[6:]
+    assert list(field.images) == [paths[4]]
+    assert list(channel.images) == [paths[7]]
+    assert leica_sample.remove_image(paths[5]) is None
+
+
+async def test_matched_samples(leica_sample):
+    """Test matching containers via the sample index."""
+    for well_x in range(2):
+        for field_x in range(3):
+            await set_image(leica_sample, well_x, field_x, 0)
+
+    fields = get_matched_samples(
+        leica_sample, "field", attrs={"well_x": 1, "plate_name": "00"}
+    )
+
+    assert [(field.well_x, field.field_x) for field in fields] == [
+        (1, 0),
+        (1, 1),
+        (1, 2),
+    ]
+    assert not get_matched_samples(
+        leica_sample, "field", attrs={"well_x": 0}, values={"field_img_ok": True}
+    )
+
+    for field_x in (2, 0):
+        await leica_sample.set_sample(
+            "field",
+            plate_name="00",
+            well_x=0,
+            well_y=0,
+            field_x=field_x,
+            field_y=0,
+            values={"field_img_ok": True},
+        )
+    fields = get_matched_samples(
+        leica_sample, "field", attrs={"well_x": 0}, values={"field_img_ok": True}
+    )
+
+    assert [field.field_x for field in fields] == [0, 2]
+    assert len(get_matched_samples(leica_sample, "field")) == 6
+    assert len(get_matched_samples(leica_sample, "well", values={"ok": None})) == 2
+    assert not get_matched_samples(leica_sample, "well", values={"ok": [1]})
+
+    await leica_sample.set_sample(
+        "field",
+        plate_name="00",
+        well_x=0,
+        well_y=0,
+        field_x=2,
+        field_y=0,
+        values={"field_img_ok": False},
+    )
+    fields = get_matched_samples(
+        leica_sample, "field", attrs={"well_x": 0}, values={"field_img_ok": True}
+    )
+
+    assert [field.field_x for field in fields] == [0]
+
+
+async def set_well_done(sample, well_x, well_y, done=True):
+    """Set the well image ok value of a well."""
+    await sample.set_sample(
+        "well",
+        plate_name="00",
+        well_x=well_x,
+        well_y=well_y,
+        values={"well_img_ok": done},
+    )
+
+
+async def test_next_well_xy(leica_sample):
+    """Test finding the next not done well."""
+    assert next_well_xy(leica_sample, "00", 48, 32) == (None, None)
+
+    await leica_sample.set_sample("plate", plate_name="00")
+
+    assert next_well_xy(leica_sample, "00", 48, 32) == (0, 0)
+    assert next_well_xy(leica_sample, "00") == (None, None)
+
+    await set_well_done(leica_sample, 0, 1)
+    await set_well_done(leica_sample, 0, 0)
+
+    assert next_well_xy(leica_sample, "00", 48, 32) == (0, 2)
+    assert next_well_xy(leica_sample, "00", 2, 2) == (1, 0)
+
+    for well_y in range(2, 32):
+        await set_well_done(leica_sample, 0, well_y)
+
+    assert next_well_xy(leica_sample, "00", 48, 32) == (1, 0)
+
+    await set_well_done(leica_sample, 0, 5, False)
+
+    assert next_well_xy(leica_sample, "00", 48, 32) == (0, 5)
+    assert next_well_xy(leica_sample, "00") == (0, 5)
+
+    await set_well_done(leica_sample, 0, 5)
+    await set_well_done(leica_sample, 1, 0)
+    await set_well_done(leica_sample, 1, 1)
+
+    assert next_well_xy(leica_sample, "00", 2, 2) == (None, None)
+    assert next_well_xy(leica_sample, "00", 48, 32) == (1, 2)
+
+
+async def test_set_samples(center, leica_sample):
+    """Test setting many containers with one event per touched container."""
+    await plugins.setup_module(center, {"sample": {}})
+    events = []
+
+    async def handle_event(center, event):
+        """Record the sample events."""
+        events.append(event)
+
+    center.bus.register(SAMPLE_EVENT, handle_event)
+    samples = [
+        {
+            "name": "image",
+            "path": f"C{channel_id:02d}.ome.tif",
+            "plate_name": "00",
+            "well_x": "1",
+            "well_y": 0,
+            "field_x": 0,
+            "field_y": 0,
+            "z_slice_id": 0,
+            "channel_id": channel_id,
+        }
+        for channel_id in range(2)
+    ]
+    samples.append(
+        {
+            "name": "well",
+            "plate_name": "00",
+            "well_x": 1,
+            "well_y": 0,
+            "values": {"well_img_ok": 1},
+        }
+    )
+
+    await center.actions.call("sample", "set_samples", samples=samples)
+    await center.wait_for()
+
+    assert [event.container_name for event in events] == [
+        "plate",
+        "well",
+        "field",
+        "z_slice",
+        "channel",
+        "image",
+        "channel",
+        "image",
+    ]
+    well = leica_sample.get_sample("well", plate_name="00", well_x=1, well_y=0)
+    assert events[1].container is well
+    assert well.values == {"well_img_ok": True}
+    assert list(well.images) == ["C00.ome.tif", "C01.ome.tif"]
+
+    events.clear()
+    samples[0]["well_x"] = "a"
+    await center.actions.call("sample", "set_samples", samples=samples)
+    await center.wait_for()
+
+    assert not events
+    assert "C00.ome.tif" in leica_sample.images
+
+
+async def test_image_values(leica_sample):
+    """Test that image values are only stored when set."""
+    path = await set_image(leica_sample, 0, 0, 0)
+    image = leica_sample.images[path]
+
+    assert image.values == {}
+    with pytest.raises(TypeError):
+        image.values["ok"] = True
+    assert image.attrs == {
+        "plate_name": "00",
+        "well_x": 0,
+        "well_y": 0,
+        "field_x": 0,
+        "field_y": 0,
+        "z_slice_id": 0,
+        "channel_id": 0,
+    }
+
+    await leica_sample.set_sample(
+        "image", path=path, values={"ok": True}, **image.attrs
+    )
+
+    assert leica_sample.images[path] is image
+    assert image.values == {"ok": True}
+    assert get_matched_samples(leica_sample, "image", values={"ok": True}) == [image]
+
+
+async def test_container_key(leica_sample):
+    """Test that containers are identified independent of attribute order."""
+    well = await leica_sample.set_sample("well", plate_name="00", well_x=1, well_y=2)
+    same_well = await leica_sample.set_sample(
+        "well", well_y=2, well_x=1, plate_name="00", values={"well_img_ok": True}
+    )
+
+    assert same_well is well
+    assert len(leica_sample.data) == 2
+    assert leica_sample.get_sample("well", well_y=2, plate_name="00", well_x=1) is well
+    id_string = '{"name": "well", "plate_name": "00", "well_x": 1, "well_y": 2}'
+    assert leica_sample.data[id_string] is well
+    assert leica_sample.data.get(id_string) is well
+    assert id_string in leica_sample.data
+    assert '{"name": "well"}' not in leica_sample.data
+    assert "invalid" not in leica_sample.data
+    with pytest.raises(KeyError):
+        _ = leica_sample.data['{"name": "plate", "plate_name": "01"}']
+
+
+async def test_next_well_xy_order(leica_sample):
+    """Test finding the next not done well in serpentine order."""
+    await leica_sample.set_sample("plate", plate_name="00")
+    for well_y in range(4):
+        await set_well_done(leica_sample, 0, well_y)
+
+    assert next_well_xy(leica_sample, "00", 3, 4, "serpentine") == (1, 3)
+    assert next_well_xy(leica_sample, "00", 3, 4) == (1, 0)
+
+    await set_well_done(leica_sample, 1, 3)
+    await set_well_done(leica_sample, 0, 2, False)
+
+    assert next_well_xy(leica_sample, "00", 3, 4, "serpentine") == (0, 2)
+
+    await set_well_done(leica_sample, 0, 2)
+
+    assert next_well_xy(leica_sample, "00", 3, 4, "serpentine") == (1, 2)
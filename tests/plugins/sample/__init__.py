@@ -0,0 +1 @@
+"""Sample tests."""
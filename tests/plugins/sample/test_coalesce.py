@@ -0,0 +1,74 @@
+"""Test coalescing of sample change events."""
+
+import asyncio
+
+from camacq import plugins
+from camacq.control import CamAcqStopEvent, Center
+from camacq.plugins.leica.sample import LeicaSample
+from camacq.plugins.sample import SAMPLE_COALESCER, SAMPLE_EVENT, register_sample
+
+
+async def setup_center(window):
+    """Return a center, a leica sample and a list of fired sample events."""
+    center = Center(loop=asyncio.get_running_loop())
+    center._track_tasks = True  # pylint: disable=protected-access
+    config = {"sample": {"coalesce": {"window": window}}}
+    await plugins.setup_module(center, config)
+    sample = LeicaSample()
+    register_sample(center, sample)
+    events = []
+
+    async def handle_event(center, event):
+        """Record the sample events."""
+        events.append((event.container_name, dict(event.values)))
+
+    center.bus.register(SAMPLE_EVENT, handle_event)
+    return center, sample, events
+
+
+async def set_well(sample, **values):
+    """Set the well 0, 0 with values."""
+    await sample.set_sample(
+        "well", plate_name="00", well_x=0, well_y=0, values=values or None
+    )
+
+
+async def test_unchanged_values():
+    """Test that updates that don't change values don't fire events."""
+    _, sample, events = await setup_center(0)
+
+    await set_well(sample, well_img_ok=True)
+    await set_well(sample, well_img_ok=True)
+    await set_well(sample)
+
+    assert events == [
+        ("plate", {}),
+        ("well", {"well_img_ok": True}),
+    ]
+
+    await set_well(sample, well_img_ok=True, gain=800)
+
+    assert events[-1] == ("well", {"well_img_ok": True, "gain": 800})
+    assert len(events) == 3
+
+
+async def test_coalesce_window():
+    """Test that events of a container are merged within the window."""
+    center, sample, events = await setup_center(60)
+
+    for gain in range(3):
+        await set_well(sample, gain=gain)
+    await sample.set_sample("plate", plate_name="00", values={"ok": True})
+
+    assert not events
+
+    await center.data[SAMPLE_COALESCER].flush()
+
+    assert events == [("plate", {"ok": True}), ("well", {"gain": 2})]
+
+    await set_well(sample, gain=3)
+    await center.bus.notify(CamAcqStopEvent({"exit_code": 0}))
+    await center.wait_for()
+
+    assert events[-1] == ("well", {"gain": 3})
+    assert len(events) == 3
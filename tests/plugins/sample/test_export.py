@@ -0,0 +1,106 @@
+"""Test exporting sample state."""
+
+import csv
+import json
+
+from camacq import plugins
+from camacq.plugins.leica.sample import LeicaSample
+from camacq.plugins.sample import register_sample
+from camacq.plugins.sample.export import export_snapshot
+
+
+async def setup_sample(center):
+    """Return a leica sample with an image and a channel with values."""
+    await plugins.setup_module(center, {"sample": {}})
+    sample = LeicaSample()
+    register_sample(center, sample)
+    await sample.set_sample(
+        "image",
+        path="image--C01.ome.tif",
+        plate_name="00",
+        well_x=1,
+        well_y=1,
+        field_x=0,
+        field_y=0,
+        z_slice_id=0,
+        channel_id=1,
+        values={"ok": True},
+    )
+    await sample.set_sample(
+        "channel",
+        plate_name="00",
+        well_x=1,
+        well_y=1,
+        channel_id=1,
+        values={"channel_name": "green", "gain": 800},
+    )
+    return sample
+
+
+async def test_export_csv(center, tmp_path):
+    """Test exporting a sample to CSV."""
+    await setup_sample(center)
+    path = tmp_path / "export.csv"
+
+    await center.actions.call("sample", "export", sample_name="leica", path=path)
+    await center.wait_for()
+
+    with open(path, encoding="utf-8", newline="") as export_file:
+        rows = list(csv.DictReader(export_file))
+    assert list(rows[0])[:5] == [
+        "plate_name",
+        "well_x",
+        "well_y",
+        "channel_name",
+        "gain",
+    ]
+    assert [row["name"] for row in rows] == [
+        "plate",
+        "well",
+        "field",
+        "z_slice",
+        "channel",
+        "image",
+    ]
+    channel, image = rows[4:]
+    assert channel["channel_name"] == "green"
+    assert channel["gain"] == "800"
+    assert channel["channel_id"] == "1"
+    assert image["path"] == "image--C01.ome.tif"
+    assert json.loads(image["values"]) == {"ok": True}
+
+
+async def test_export_snapshot(center, tmp_path):
+    """Test that values set during an export are not exported."""
+    sample = await setup_sample(center)
+    path = tmp_path / "export.jsonl"
+
+    with sample.snapshot() as snapshot:
+        await sample.set_sample(
+            "channel",
+            plate_name="00",
+            well_x=1,
+            well_y=1,
+            channel_id=1,
+            values={"gain": 600},
+        )
+        await sample.set_sample("plate", plate_name="01")
+        await export_snapshot(center, snapshot, path, "jsonl")
+
+    with open(path, encoding="utf-8") as export_file:
+        rows = [json.loads(line) for line in export_file]
+    assert len(rows) == 6
+    assert rows[4] == {
+        "name": "channel",
+        "channel_id": 1,
+        "plate_name": "00",
+        "well_x": 1,
+        "well_y": 1,
+        "values": {"channel_name": "green", "gain": 800},
+    }
+    assert not sample._snapshots  # pylint: disable=protected-access
+    await sample.export(path, "jsonl")
+    with open(path, encoding="utf-8") as export_file:
+        rows = [json.loads(line) for line in export_file]
+    assert len(rows) == 7
+    assert rows[4]["values"]["gain"] == 600
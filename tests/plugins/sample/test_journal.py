@@ -0,0 +1,185 @@
+"""Test the sample journal."""
+
+import asyncio
+from unittest.mock import patch
+
+from camacq import plugins
+from camacq.control import CamAcqStartEvent, CamAcqStopEvent, Center
+from camacq.plugins.leica.sample import LeicaSample
+from camacq.plugins.sample import (
+    SAMPLE_EVENT,
+    SAMPLE_JOURNAL,
+    ContainerKey,
+    get_matched_samples,
+    register_sample,
+)
+
+
+async def setup_center(journal_path):
+    """Return a center with the journal and a leica sample set up."""
+    center = Center(loop=asyncio.get_running_loop())
+    center._track_tasks = True  # pylint: disable=protected-access
+    config = {"sample": {"journal": {"path": str(journal_path)}}}
+    await plugins.setup_module(center, config)
+    sample = LeicaSample()
+    register_sample(center, sample)
+    await center.bus.notify(CamAcqStartEvent())
+    await center.wait_for()
+    return center, sample
+
+
+async def test_journal_restore(tmp_path):
+    """Test restoring samples from the snapshot and journal."""
+    journal_path = tmp_path / "samples.journal"
+    center, sample = await setup_center(journal_path)
+    for field_x in range(3):
+        await sample.set_sample(
+            "image",
+            path=f"image_{field_x}",
+            plate_name="00",
+            well_x=1,
+            well_y=0,
+            field_x=field_x,
+            field_y=0,
+            z_slice_id=0,
+            channel_id=0,
+        )
+    await center.samples.leica.journal.snapshot()
+    await sample.set_sample(
+        "well", plate_name="00", well_x=1, well_y=0, values={"well_img_ok": True}
+    )
+    await center.bus.notify(CamAcqStopEvent({"exit_code": 0}))
+    await center.wait_for()
+
+    # The last change is only in the journal, the rest is in the snapshot.
+    assert journal_path.read_text(encoding="utf-8").count("\n") == 1
+
+    events = []
+
+    async def handle_event(center, event):
+        """Collect sample events."""
+        events.append(event)
+
+    new_center = Center(loop=asyncio.get_running_loop())
+    new_center.bus.register(SAMPLE_EVENT, handle_event)
+    config = {"sample": {"journal": {"path": str(journal_path)}}}
+    await plugins.setup_module(new_center, config)
+    new_sample = LeicaSample()
+    register_sample(new_center, new_sample)
+    await new_center.bus.notify(CamAcqStartEvent())
+    await new_center.wait_for()
+
+    assert not events
+    assert list(new_sample.data) == list(sample.data)
+    assert list(new_sample.images) == ["image_0", "image_1", "image_2"]
+    well = new_sample.get_sample("well", plate_name="00", well_x=1, well_y=0)
+    assert well.values == {"well_img_ok": True}
+    assert list(well.images) == ["image_0", "image_1", "image_2"]
+    field = new_sample.get_sample(
+        "field", plate_name="00", well_x=1, well_y=0, field_x=2, field_y=0
+    )
+    assert list(field.images) == ["image_2"]
+    # The journal is compacted into the snapshot after restore.
+    assert not journal_path.read_text(encoding="utf-8")
+
+
+async def test_journal_incomplete_line(tmp_path):
+    """Test that an incomplete last journal line is skipped."""
+    journal_path = tmp_path / "samples.journal"
+    journal_path.write_text(
+        '["leica", "{\\"name\\": \\"plate\\", \\"plate_name\\": \\"00\\"}", {}]\n'
+        '["leica", "{\\"name\\": \\"well\\"',
+        encoding="utf-8",
+    )
+
+    _, sample = await setup_center(journal_path)
+
+    assert list(sample.data) == [ContainerKey("plate", ("plate_name",), ("00",))]
+    assert '{"name": "plate", "plate_name": "00"}' in sample.data
+
+
+async def restore_center(journal_path):
+    """Return a new center and leica sample restored from the journal."""
+    center = Center(loop=asyncio.get_running_loop())
+    config = {"sample": {"journal": {"path": str(journal_path)}}}
+    await plugins.setup_module(center, config)
+    sample = LeicaSample()
+    register_sample(center, sample)
+    await center.bus.notify(CamAcqStartEvent())
+    await center.wait_for()
+    return center, sample
+
+
+async def rename(sample, old_path, new_path):
+    """Rename an image in the sample like the rename_image plugin."""
+    image = sample.remove_image(old_path)
+    await sample.set_sample(
+        image.name, path=new_path, values=dict(image.values), **image.attrs
+    )
+
+
+async def test_journal_restore_renamed_image(tmp_path):
+    """Test that renamed images are restored with the new path only."""
+    journal_path = tmp_path / "samples.journal"
+    center, sample = await setup_center(journal_path)
+    attrs = {
+        "plate_name": "00",
+        "well_x": 0,
+        "well_y": 0,
+        "field_x": 0,
+        "field_y": 0,
+        "z_slice_id": 0,
+        "channel_id": 0,
+    }
+    await sample.set_sample("image", path="/a/old.tif", **attrs)
+    await sample.set_sample("image", path="/a/other.tif", **{**attrs, "channel_id": 1})
+    await center.samples.leica.journal.snapshot()
+    await rename(sample, "/a/old.tif", "/a/new.tif")
+    await center.bus.notify(CamAcqStopEvent({"exit_code": 0}))
+    await center.wait_for()
+
+    _, new_sample = await restore_center(journal_path)
+
+    assert list(new_sample.images) == ["/a/other.tif", "/a/new.tif"]
+    assert list(new_sample.data) == list(sample.data)
+    well = new_sample.get_sample("well", plate_name="00", well_x=0, well_y=0)
+    assert list(well.images) == ["/a/other.tif", "/a/new.tif"]
+    matched = get_matched_samples(new_sample, "image", attrs={"channel_id": 0})
+    assert [image.path for image in matched] == ["/a/new.tif"]
+
+    # Restore once more from the snapshot written after the restore.
+    _, new_sample = await restore_center(journal_path)
+
+    assert list(new_sample.images) == ["/a/other.tif", "/a/new.tif"]
+
+
+async def test_journal_restore_waits(tmp_path):
+    """Test that sample changes during a restore are applied after it."""
+    journal_path = tmp_path / "samples.journal"
+    center, sample = await setup_center(journal_path)
+    for well_x in range(3):
+        await sample.set_sample(
+            "well", plate_name="00", well_x=well_x, well_y=0, values={"gain": 1}
+        )
+    await center.bus.notify(CamAcqStopEvent({"exit_code": 0}))
+    await center.wait_for()
+
+    new_center = Center(loop=asyncio.get_running_loop())
+    config = {"sample": {"journal": {"path": str(journal_path)}}}
+    await plugins.setup_module(new_center, config)
+    new_sample = LeicaSample()
+    register_sample(new_center, new_sample)
+    journal = new_center.data[SAMPLE_JOURNAL]
+
+    with patch("camacq.plugins.sample.journal.RESTORE_CHUNK_SIZE", 1):
+        restore_task = asyncio.create_task(journal.restore())
+        await asyncio.sleep(0)
+        assert journal.restoring
+        await new_sample.set_sample(
+            "well", plate_name="00", well_x=2, well_y=0, values={"gain": 2}
+        )
+        assert not journal.restoring
+        assert await restore_task == 4
+
+    well = new_sample.get_sample("well", plate_name="00", well_x=2, well_y=0)
+    assert well.values == {"gain": 2}
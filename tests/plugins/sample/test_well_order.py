@@ -0,0 +1,48 @@
+"""Test planning the order of wells."""
+
+import numpy as np
+import pytest
+
+from camacq.plugins.sample.well_order import plan_wells, well_order
+
+
+def path_length(wells):
+    """Return the travel length of a path of wells."""
+    coords = np.array(wells, dtype=float)
+    return np.hypot(*np.diff(coords, axis=0).T).sum()
+
+
+def test_well_order():
+    """Test the well orders of a plate format."""
+    assert well_order(2, 3) == ((0, 0), (0, 1), (0, 2), (1, 0), (1, 1), (1, 2))
+    assert well_order(2, 3, "serpentine") == (
+        (0, 0),
+        (0, 1),
+        (0, 2),
+        (1, 2),
+        (1, 1),
+        (1, 0),
+    )
+    for order in ("nearest", "tsp"):
+        wells = well_order(24, 16, order)
+        assert sorted(wells) == list(well_order(24, 16))
+        assert path_length(wells) == 24 * 16 - 1
+    assert well_order(24, 16, "tsp") is well_order(24, 16, "tsp")
+
+
+def test_plan_wells():
+    """Test planning the order of a subset of wells."""
+    wells = [(0, 0), (5, 5), (0, 1), (5, 4), (0, 2), (5, 6), (1, 1)]
+
+    nearest = plan_wells(wells, "nearest")
+    tsp = plan_wells(wells, "tsp")
+
+    assert nearest[0] == tsp[0] == (0, 0)
+    assert sorted(nearest) == sorted(tsp) == sorted(wells)
+    assert path_length(tsp) <= path_length(nearest) < path_length(wells)
+
+
+def test_unknown_order():
+    """Test that an unknown order raises."""
+    with pytest.raises(ValueError):
+        plan_wells([(0, 0)], "spiral")
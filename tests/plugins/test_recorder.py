@@ -0,0 +1,103 @@
+"""Test the event recorder plugin."""
+
+import asyncio
+from collections import OrderedDict
+from unittest.mock import patch
+
+from camacq import plugins
+from camacq.control import CamAcqStopEvent, Center
+from camacq.event import Event
+from camacq.plugins.leica import LeicaCommandEvent, LeicaImageEvent
+from camacq.plugins import recorder
+from camacq.plugins.recorder import load_records, replay_events
+
+IMAGE_PATH = (
+    "/root/subfolder/exp1/CAM1/slide--S00/chamber--U00--V00/field--X01--Y01"
+    "/image--L0000--S00--U00--V00--J15--E04--O01--X01--Y01--T0000--Z00--C00.ome.tif"
+)
+
+
+async def test_record_and_replay(center, tmp_path):
+    """Test recording events and replaying them in a fresh center."""
+    log_path = tmp_path / "events.log"
+    config = {"recorder": {"path": str(log_path), "flush_interval": 0.0}}
+    await plugins.setup_module(center, config)
+
+    async def fire_nested(center, event):
+        """Fire a nested event."""
+        await center.bus.notify(Event({"nested": True}))
+
+    center.bus.register(LeicaCommandEvent.event_type, fire_nested)
+    await center.bus.notify(LeicaImageEvent({"path": IMAGE_PATH}))
+    await center.bus.notify(LeicaCommandEvent(OrderedDict([("cmd", "deletelist")])))
+    await center.bus.notify(CamAcqStopEvent({"exit_code": 0}))
+    await center.wait_for()
+
+    records = load_records(log_path)
+
+    assert [(record["event"], record["depth"]) for record in records] == [
+        ("camacq.plugins.leica:LeicaImageEvent", 0),
+        ("camacq.plugins.leica:LeicaCommandEvent", 0),
+        ("camacq.event:Event", 1),
+        ("camacq.control:CamAcqStopEvent", 0),
+    ]
+
+    replay_center = Center(loop=asyncio.get_running_loop())
+    events = []
+
+    async def handle_event(center, event):
+        """Collect replayed events."""
+        events.append(event)
+
+    replay_center.bus.register("base_event", handle_event)
+    replayed = await replay_events(replay_center, log_path)
+
+    assert replayed == 2
+    assert len(events) == 2
+    image_event = events[0]
+    command_event = events[1]
+    assert isinstance(image_event, LeicaImageEvent)
+    assert image_event.path == IMAGE_PATH
+    assert image_event.job_id == 4
+    assert image_event.field_x == 1
+    assert isinstance(command_event, LeicaCommandEvent)
+    assert command_event.command == "/cmd:deletelist"
+
+
+async def test_load_records_incomplete_line(tmp_path):
+    """Test that an incomplete last record is skipped."""
+    log_path = tmp_path / "events.log"
+    log_path.write_text(
+        '{"time":1.0,"depth":0,"event":"camacq.event:Event","data":{}}\n{"time":',
+        encoding="utf-8",
+    )
+
+    records = load_records(log_path)
+
+    assert len(records) == 1
+    assert records[0]["event"] == "camacq.event:Event"
+
+
+async def test_replay_in_chunks(center, tmp_path):
+    """Test that the event log is read in chunks while replaying."""
+    log_path = tmp_path / "events.log"
+    log_path.write_text(
+        '{"time":1.0,"depth":0,"event":"camacq.event:Event","data":{}}\n' * 5,
+        encoding="utf-8",
+    )
+    events = []
+
+    async def handle_event(center, event):
+        """Collect replayed events."""
+        events.append(event)
+
+    center.bus.register("base_event", handle_event)
+
+    with patch.object(recorder, "REPLAY_CHUNK_SIZE", 2), patch.object(
+        recorder, "read_chunk", wraps=recorder.read_chunk
+    ) as read_chunk:
+        replayed = await replay_events(center, log_path)
+
+    assert replayed == 5
+    assert len(events) == 5
+    assert read_chunk.call_count == 4
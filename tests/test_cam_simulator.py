@@ -0,0 +1,61 @@
+"""Test the CAM server simulator."""
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+from leicacam.cam import bytes_as_dict
+
+SIMULATOR_PATH = Path(__file__).parent.parent / "scripts/cam_simulator.py"
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def cam_simulator():
+    """Return the cam simulator module."""
+    spec = importlib.util.spec_from_file_location("cam_simulator", SIMULATOR_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class MockWriter:
+    """Represent a stream writer that stores the sent replies."""
+
+    def __init__(self):
+        """Set up instance."""
+        self.replies = []
+
+    def write(self, data):
+        """Store a sent reply."""
+        self.replies.append(bytes_as_dict(data.strip()))
+
+    async def drain(self):
+        """Drain the writer."""
+
+
+async def test_scan(cam_simulator, tmp_path):
+    """Test that a cam scan writes images and sends relpath replies."""
+    jobs = cam_simulator.parse_jobs(["p10xexp=4:0,1"])
+    simulator = cam_simulator.CamSimulator(tmp_path, 1000.0, jobs)
+    writer = MockWriter()
+
+    await simulator.handle_command(
+        writer,
+        b"/cli:abc /app:matrix /cmd:add /tar:camlist /exp:p10xexp "
+        b"/ext:af /slide:0 /wellx:1 /welly:2 /fieldx:2 /fieldy:1 /dxpos:0 /dypos:0",
+    )
+    await simulator.handle_command(writer, b"/cli:abc /app:matrix /cmd:startcamscan")
+    await simulator._scan_task  # pylint: disable=protected-access
+
+    assert simulator.camlist == {("p10xexp", 0, 1, 1, 0): True}
+    assert simulator.images == 2
+    assert writer.replies[0]["cmd"] == "add"
+    assert writer.replies[1]["cmd"] == "startcamscan"
+    rel_path = writer.replies[2]["relpath"]
+    assert "chamber--U00--V01\\field--X01--Y00" in rel_path
+    assert rel_path.endswith("--E04--O01--X01--Y00--T0000--Z00--C01.ome")
+    images = sorted(path.name for path in tmp_path.glob("**/*.ome.tif"))
+    assert len(images) == 2
+    assert images[0].endswith("--C00.ome.tif")
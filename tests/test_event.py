@@ -1,5 +1,9 @@
 """Test the event bus."""
 
+import asyncio
+
+import pytest
+
 from camacq import event as event_mod
 
 
@@ -31,3 +35,127 @@ async def test_event_bus(center):
     await center.wait_for()
 
     assert center.data.get("test") == 2
+
+
+async def test_dispatch_cache(center):
+    """Test that cached handlers are updated on register and remove."""
+    calls = []
+
+    class TestEvent(event_mod.Event):
+        """Represent a test event."""
+
+        # pylint: disable=too-few-public-methods
+
+        __slots__ = ()
+
+        event_type = "test_event"
+
+    async def base_handler(center, event):
+        """Handle base event."""
+        calls.append("base")
+
+    async def test_handler(center, event):
+        """Handle test event."""
+        calls.append("test")
+
+    bus = center.bus
+    remove_base = bus.register(event_mod.BASE_EVENT, base_handler)
+    await bus.notify(TestEvent())
+
+    assert calls == ["base"]
+
+    remove_test = bus.register("test_event", test_handler)
+    await bus.notify(TestEvent())
+
+    assert calls == ["base", "test", "base"]
+
+    remove_base()
+    await bus.notify(TestEvent())
+    await bus.notify(event_mod.Event())
+
+    assert calls == ["base", "test", "base", "test"]
+
+    remove_test()
+    await bus.notify(TestEvent())
+
+    assert calls == ["base", "test", "base", "test"]
+
+
+async def test_execution_modes(center):
+    """Test sequential, concurrent and fire and forget handlers."""
+    calls = []
+    release = asyncio.Event()
+
+    async def slow_handler(center, event):
+        """Handle event slowly."""
+        await release.wait()
+        calls.append("slow")
+
+    async def first_handler(center, event):
+        """Handle event first."""
+        calls.append("first")
+
+    async def second_handler(center, event):
+        """Handle event second and release the slow handler."""
+        calls.append("second")
+        release.set()
+
+    async def background_handler(center, event):
+        """Handle event in the background."""
+        calls.append("background")
+
+    bus = center.bus
+    bus.register(event_mod.BASE_EVENT, slow_handler, event_mod.EXECUTION_CONCURRENT)
+    bus.register(event_mod.BASE_EVENT, first_handler)
+    bus.register(event_mod.BASE_EVENT, second_handler)
+    bus.register(
+        event_mod.BASE_EVENT, background_handler, event_mod.EXECUTION_FIRE_AND_FORGET
+    )
+
+    await bus.notify(event_mod.Event())
+    await center.wait_for()
+
+    assert [call for call in calls if call != "background"] == [
+        "first",
+        "second",
+        "slow",
+    ]
+    assert "background" in calls
+
+
+async def test_invalid_execution_mode(center):
+    """Test register handler with invalid execution mode."""
+
+    async def handler(center, event):
+        """Handle event."""
+
+    with pytest.raises(ValueError):
+        center.bus.register(event_mod.BASE_EVENT, handler, "invalid")
+
+
+async def test_register_once(center, caplog):
+    """Test register a handler that is removed after it has fired."""
+    bus = center.bus
+    calls = []
+
+    async def handler(center, event):
+        """Handle event."""
+        calls.append(event)
+
+    remove = bus.register_once(event_mod.BASE_EVENT, handler)
+    event = event_mod.Event()
+    await bus.notify(event)
+    await bus.notify(event)
+
+    assert calls == [event]
+    assert not bus._registry[event_mod.BASE_EVENT]  # pylint: disable=protected-access
+
+    remove()
+    assert "already removed" not in caplog.text
+
+    remove = bus.register_once(event_mod.BASE_EVENT, handler)
+    remove()
+    await bus.notify(event)
+
+    assert calls == [event]
+    assert not bus._registry[event_mod.BASE_EVENT]  # pylint: disable=protected-access
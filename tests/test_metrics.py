@@ -0,0 +1,84 @@
+"""Test the event bus metrics."""
+
+import json
+import logging
+
+from camacq import plugins
+from camacq.const import CAMACQ_STOP_EVENT
+from camacq.event import BASE_EVENT, Event
+from camacq.metrics import BusMetrics, Histogram
+
+
+def test_histogram():
+    """Test histogram percentiles."""
+    histogram = Histogram()
+
+    assert histogram.percentile(50) == 0.0
+
+    for _ in range(98):
+        histogram.record(0.001)
+    histogram.record(0.5)
+    histogram.record(2.0)
+
+    assert histogram.count == 100
+    assert histogram.max == 2.0
+    assert 0.001 <= histogram.percentile(50) < 0.002
+    assert 0.5 <= histogram.percentile(99) < 1.0
+    assert histogram.percentile(100) == 2.0
+
+
+async def test_bus_metrics(center):
+    """Test collecting metrics on the event bus."""
+
+    async def handler(center, event):
+        """Handle event."""
+
+    center.bus.register(BASE_EVENT, handler)
+    metrics = center.bus.metrics = BusMetrics()
+
+    for _ in range(3):
+        await center.bus.notify(Event())
+
+    assert metrics.event_counts == {BASE_EVENT: 3}
+    assert len(metrics.handlers) == 1
+    stats = metrics.handlers[0]
+    assert stats.count == 3
+    assert stats.name.endswith("test_bus_metrics.<locals>.handler")
+    assert metrics.slowest(1) == [stats]
+
+
+async def test_bus_metrics_handler_per_call(center):
+    """Test that handlers registered per call share one stats entry."""
+    metrics = center.bus.metrics = BusMetrics()
+
+    for _ in range(100):
+
+        async def handler(center, event):
+            """Handle event."""
+
+        remove = center.bus.register(BASE_EVENT, handler)
+        await center.bus.notify(Event())
+        remove()
+
+    assert len(metrics.handlers) == 1
+    assert metrics.handlers[0].count == 100
+
+
+async def test_dump_metrics(center, caplog, tmp_path):
+    """Test the dump metrics action and summary on stop."""
+    caplog.set_level(logging.INFO)
+    summary_path = tmp_path / "summary.json"
+    config = {"diagnostics": {"summary_path": str(summary_path)}}
+    await plugins.setup_module(center, config)
+
+    await center.bus.notify(Event())
+    await center.actions.diagnostics.dump_metrics()
+
+    assert "Event bus metrics:" in caplog.text
+    assert f"{BASE_EVENT}: 1" in caplog.text
+
+    await center.end(0)
+    summary = json.loads(summary_path.read_text(encoding="utf-8"))
+
+    assert summary["event_counts"] == {BASE_EVENT: 1, CAMACQ_STOP_EVENT: 1}
+    assert summary["slowest"][0]["name"].endswith("setup_module.<locals>.handle_stop")